@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dates in the Islamic (Hijri), Hebrew, Persian and Indian civil calendars.
+The months overlapping each Gregorian year are found once, by converting with
+calendars.calendar_util, and kept as the ordinals of their first days; a date
+is then placed by binary search, whichever calendar it is in."""
+
+from bisect import bisect_right
+from calendars import calendar_util
+from date_context import ORDINAL_EPOCH_JD
+
+HIJRI = 'hijri'
+HEBREW = 'hebrew'
+PERSIAN = 'persian'
+INDIAN_CIVIL = 'indian_civil'
+ALTERNATE_CALENDARS = (HIJRI, HEBREW, PERSIAN, INDIAN_CIVIL)
+
+# Month names by month number - 1
+HIJRI_MONTH_NAMES = (
+    'Muharram', 'Safar', "Rabi' al-Awwal", "Rabi' al-Thani",
+    'Jumada al-Ula', 'Jumada al-Akhirah', 'Rajab', "Sha'ban", 'Ramadan',
+    'Shawwal', "Dhu al-Qi'dah", 'Dhu al-Hijjah')
+# Nisan is month 1, though the year begins with Tishrei (7); leap years
+# have Adar I (12) and Adar II (13)
+HEBREW_MONTH_NAMES = (
+    'Nisan', 'Iyar', 'Sivan', 'Tammuz', 'Av', 'Elul', 'Tishrei', 'Cheshvan',
+    'Kislev', 'Tevet', 'Shevat', 'Adar', 'Adar II')
+HEBREW_LEAP_ADAR = 'Adar I'
+PERSIAN_MONTH_NAMES = (
+    'Farvardin', 'Ordibehesht', 'Khordad', 'Tir', 'Mordad', 'Shahrivar',
+    'Mehr', 'Aban', 'Azar', 'Dey', 'Bahman', 'Esfand')
+INDIAN_CIVIL_MONTH_NAMES = (
+    'Chaitra', 'Vaishakha', 'Jyeshtha', 'Ashadha', 'Shravana', 'Bhadra',
+    'Ashvin', 'Kartika', 'Agrahayana', 'Pausha', 'Magha', 'Phalguna')
+
+
+MONTH_NAMES = {
+    HIJRI: HIJRI_MONTH_NAMES,
+    HEBREW: HEBREW_MONTH_NAMES,
+    PERSIAN: PERSIAN_MONTH_NAMES,
+    INDIAN_CIVIL: INDIAN_CIVIL_MONTH_NAMES,
+}
+
+JD_TO_DATE = {
+    HIJRI: calendar_util.jd_to_islamic,
+    HEBREW: calendar_util.jd_to_hebrew,
+    PERSIAN: calendar_util.jd_to_persian,
+    INDIAN_CIVIL: calendar_util.jd_to_indian_civil,
+}
+
+
+def get_month_name(calendar, year, month):
+    if calendar == HEBREW:
+        if month == 12 and calendar_util.hebrew_leap(year):
+            return HEBREW_LEAP_ADAR
+        return HEBREW_MONTH_NAMES[month - 1]
+    return MONTH_NAMES[calendar][month - 1]
+
+
+def get_month_names(calendar):
+    """Returns every month name of the calendar."""
+    names = list(MONTH_NAMES[calendar])
+    if calendar == HEBREW:
+        names.append(HEBREW_LEAP_ADAR)
+    return names
+
+
+class AlternateCalendar(object):
+    """Converts dates to the calendar named (HIJRI, HEBREW, PERSIAN or
+    INDIAN_CIVIL), and computes its columns, all prefixed by its name."""
+
+    def __init__(self, name):
+        if name not in JD_TO_DATE:
+            raise ValueError("Unknown calendar: %s" % name)
+        self.name = name
+        self.jd_to_date = JD_TO_DATE[name]
+        self.year_column = name + '_year'
+        self.month_column = name + '_month'
+        self.day_column = name + '_day'
+        self.month_name_column = name + '_month_name'
+        self.year_month_key_column = name + '_year_month_key'
+        self.date_key_column = name + '_date_key'
+        # {Gregorian year: (first ordinal of each month overlapping it,
+        #                   the month's columns)}
+        self._years = dict()
+
+    def _convert(self, ordinal):
+        return self.jd_to_date(ordinal + ORDINAL_EPOCH_JD)
+
+    def _month_columns(self, year, month):
+        return {
+            self.year_column: year,
+            self.month_column: month,
+            self.month_name_column: get_month_name(self.name, year, month),
+            self.year_month_key_column: year*100 + month,
+        }
+
+    def _build_year(self, first_ordinal, last_ordinal):
+        year, month, day = self._convert(first_ordinal)
+        start = first_ordinal - day + 1
+        starts, months = [], []
+        while start <= last_ordinal:
+            starts.append(start)
+            months.append(self._month_columns(year, month))
+            # Months are at least 29 days; step to the first day of the next
+            start += 28
+            while self._convert(start)[:2] == (year, month):
+                start += 1
+            year, month = self._convert(start)[:2]
+        return starts, months
+
+    def get_year(self, year, first_ordinal, last_ordinal):
+        """Returns the first ordinals and columns of the months overlapping
+        the Gregorian year, which runs from first_ordinal to last_ordinal."""
+        months = self._years.get(year)
+        if months is None:
+            months = self._years.setdefault(
+                year, self._build_year(first_ordinal, last_ordinal))
+        return months
+
+    def get_month(self, ordinal, year_context):
+        """Returns the columns shared by every day of the month containing
+        the day ordinal, and the ordinal of its first day. year_context is
+        the date_context.YearContext of the day's Gregorian year."""
+        starts, months = self.get_year(year_context.year,
+                                       year_context.first_ordinal,
+                                       year_context.last_ordinal)
+        i = bisect_right(starts, ordinal) - 1
+        return months[i], starts[i]
+
+
+_calendars = dict()
+
+
+def get_alternate_calendar(name):
+    """Returns the shared AlternateCalendar of the name given."""
+    try:
+        return _calendars[name]
+    except KeyError:
+        return _calendars.setdefault(name, AlternateCalendar(name))
+
+
+get_alternate_calendar.cache_clear = _calendars.clear
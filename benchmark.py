@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Times the hot paths of date dimension generation and writes the results
+as JSON, optionally comparing them against a previous run's results."""
+
+import sys
+import gc
+import json
+import time
+import platform
+import resource
+import multiprocessing
+from datetime import date, timedelta
+from calendars import astro
+from calendars import astro_array
+from calendars import calendar_util
+from calendars import calendar_util_array
+from calendars.business_days import get_business_calendar
+from calendars.holidays import Holidays
+from calendars.holiday_rules import RULE_SETS
+from date_context import get_year_context, get_month_context
+from date_dimension import DateDimension, get_row_type
+from fiscal_calendar import DEFAULT_FISCAL_CALENDAR
+from seasons import DEFAULT_SEASON_CALENDAR
+from alternate_calendars import ALTERNATE_CALENDARS, get_alternate_calendar
+from generate_date_dimension import (generate_date_dimension,
+                                     generate_solar_table)
+from solar import Location, DEFAULT_SOLAR_EPHEMERIS
+
+
+BENCHMARKS = []
+
+# Results slower than the baseline by more than this factor are regressions
+DEFAULT_THRESHOLD = 1.25
+
+
+def benchmark(name, ops, repeat=None, setup=None):
+    """Registers a function as a benchmark. The function performs ops
+    operations; per-operation times are reported. It takes no arguments,
+    or, given setup, what setup returns, which is built once and not
+    timed."""
+    def decorator(fn):
+        BENCHMARKS.append((name, fn, ops, repeat, setup))
+        return fn
+    return decorator
+
+
+def clear_caches():
+    # Each timed run should pay for building the shared holiday indexes,
+    # contexts and tables
+    Holidays._index_cache.clear()
+    for rule_set in RULE_SETS.values():
+        rule_set._index_cache.clear()
+    get_year_context.cache_clear()
+    get_month_context.cache_clear()
+    get_row_type.cache_clear()
+    DateDimension.cache_clear()
+    calendar_util.hebrew_cache_clear()
+    calendar_util_array.month_cache_clear()
+    astro_array.table_cache_clear()
+    get_business_calendar.cache_clear()
+    DEFAULT_FISCAL_CALENDAR.cache_clear()
+    DEFAULT_SEASON_CALENDAR.cache_clear()
+    get_alternate_calendar.cache_clear()
+    DEFAULT_SOLAR_EPHEMERIS.cache_clear()
+
+
+def _dates(start, n):
+    return [start + timedelta(days=i) for i in range(n)]
+
+
+def _jds(n):
+    first = calendar_util.gregorian_to_jd(1900, 1, 1)
+    return [first + i * 73 for i in range(n)]
+
+
+## Benchmarks ##
+
+@benchmark('date_dimension_row', 3650)
+def bench_date_dimension_row():
+    for d in _dates(date(2000, 1, 1), 3650):
+        DateDimension(d)
+
+
+@benchmark('generate_date_dimension_1_year', 366)
+def bench_generate_1_year():
+    for dim in generate_date_dimension(date(1999, 12, 31), date(2000, 12, 31)):
+        pass
+
+
+@benchmark('generate_date_dimension_10_years', 3653)
+def bench_generate_10_years():
+    for dim in generate_date_dimension(date(1999, 12, 31), date(2009, 12, 31)):
+        pass
+
+
+@benchmark('generate_date_dimension_100_years', 36525, repeat=1)
+def bench_generate_100_years():
+    for dim in generate_date_dimension(date(1999, 12, 31), date(2099, 12, 31)):
+        pass
+
+
+@benchmark('generate_date_dimension_10_years_narrow', 3653)
+def bench_generate_10_years_narrow():
+    for dim in generate_date_dimension(date(1999, 12, 31), date(2009, 12, 31),
+                                       columns=['date_key', 'is_holiday',
+                                                'quarter_label']):
+        pass
+
+
+@benchmark('generate_date_dimension_10_years_calendars', 3653)
+def bench_generate_10_years_alternate_calendars():
+    for dim in generate_date_dimension(date(1999, 12, 31), date(2009, 12, 31),
+                                       alternate_calendars=ALTERNATE_CALENDARS):
+        pass
+
+
+@benchmark('generate_solar_table_500_locations', 366 * 500)
+def bench_generate_solar_table():
+    locations = [Location(i, -60 + i * 0.24, -180 + i * 0.72)
+                 for i in range(500)]
+    for row in generate_solar_table(date(1999, 12, 31), date(2000, 12, 31),
+                                    locations):
+        pass
+
+
+@benchmark('date_dimension_row_lazy', 3650)
+def bench_date_dimension_row_lazy():
+    for d in _dates(date(2000, 1, 1), 3650):
+        DateDimension(d, lazy=True).columns['is_holiday']
+
+
+@benchmark('holidays_is_holiday', 36525)
+def bench_is_holiday():
+    for d in _dates(date(2000, 1, 1), 36525):
+        Holidays(d.year).is_holiday(d)
+
+
+@benchmark('holiday_rules_us_federal', 36525)
+def bench_holiday_rules():
+    us_federal = RULE_SETS['us_federal']
+    for d in _dates(date(2000, 1, 1), 36525):
+        us_federal.is_holiday(d)
+
+
+def _ten_years_of_rows():
+    return list(generate_date_dimension(date(1999, 12, 31),
+                                        date(2009, 12, 31)))
+
+
+@benchmark('generate_insert_statement', 3653, setup=_ten_years_of_rows)
+def bench_generate_insert_statement(dims):
+    for dim in dims:
+        dim.generate_insert_statement()
+
+
+@benchmark('calendar_util_hebrew', 2000)
+def bench_hebrew():
+    for jd in _jds(1000):
+        calendar_util.hebrew_to_jd(*calendar_util.jd_to_hebrew(jd))
+
+
+@benchmark('calendar_util_islamic', 2000)
+def bench_islamic():
+    for jd in _jds(1000):
+        calendar_util.islamic_to_jd(*calendar_util.jd_to_islamic(jd))
+
+
+@benchmark('calendar_util_persian', 2000)
+def bench_persian():
+    for jd in _jds(1000):
+        calendar_util.persian_to_jd(*calendar_util.jd_to_persian(jd))
+
+
+@benchmark('calendar_util_array_hebrew', 36525)
+def bench_hebrew_array():
+    first = calendar_util.gregorian_to_jd(2000, 1, 1)
+    calendar_util_array.jd_to_hebrew(
+        [first + i for i in range(36525)])
+
+
+@benchmark('calendar_util_array_persian', 36525)
+def bench_persian_array():
+    first = calendar_util.gregorian_to_jd(2000, 1, 1)
+    calendar_util_array.jd_to_persian(
+        [first + i for i in range(36525)])
+
+
+@benchmark('astro_equinox', 4000)
+def bench_equinox():
+    for year in range(1500, 2500):
+        for which in range(4):
+            astro.equinox(year, which)
+
+
+@benchmark('astro_sunpos', 5000)
+def bench_sunpos():
+    for jd in _jds(5000):
+        astro.sunpos(jd)
+
+
+@benchmark('astro_equation_of_time', 5000)
+def bench_equation_of_time():
+    for jd in _jds(5000):
+        astro.equationOfTime(jd)
+
+
+@benchmark('astro_array_equation_of_time', 36525)
+def bench_equation_of_time_array():
+    first = calendar_util.gregorian_to_jd(2000, 1, 1)
+    astro_array.equationOfTime([first + i for i in range(36525)])
+
+
+## Measurement ##
+
+def time_benchmark(fn, repeat, args=()):
+    timings = []
+    for i in range(repeat):
+        clear_caches()
+        gc.collect()
+        t = time.time()
+        fn(*args)
+        timings.append(time.time() - t)
+    return timings
+
+
+def _measure_peak_memory(fn, args, conn):
+    clear_caches()
+    gc.collect()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(*args)
+    conn.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+    conn.close()
+
+
+def peak_memory_kb(fn, args=()):
+    """Runs fn(*args) once in a fresh process and returns how far it raised
+    the process's peak resident set size, in kilobytes."""
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(target=_measure_peak_memory,
+                                args=(fn, args, child_conn))
+    p.start()
+    peak = parent_conn.recv()
+    p.join()
+    return peak
+
+
+def run_benchmarks(names=None, repeat=5, memory=True):
+    results = []
+    for name, fn, ops, fixed_repeat, setup in BENCHMARKS:
+        if names and not any(n in name for n in names):
+            continue
+        args = (setup(),) if setup else ()
+        timings = sorted(time_benchmark(fn, fixed_repeat or repeat, args))
+        result = {
+            'name': name,
+            'ops': ops,
+            'repeat': len(timings),
+            'min_seconds': timings[0],
+            'median_seconds': timings[len(timings) // 2],
+            'mean_seconds': sum(timings) / len(timings),
+            'min_us_per_op': timings[0] / ops * 1e6,
+        }
+        if memory:
+            result['peak_rss_kb'] = peak_memory_kb(fn, args)
+        results.append(result)
+        sys.stderr.write("%-40s %12.2f us/op\n" % (name,
+                                                   result['min_us_per_op']))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns (name, baseline, current) for each benchmark whose fastest
+    time per operation is slower than the baseline by more than the
+    threshold factor."""
+    previous = dict((r['name'], r) for r in baseline['results'])
+    regressions = []
+    for r in report['results']:
+        if r['name'] in previous:
+            before = previous[r['name']]['min_us_per_op']
+            if r['min_us_per_op'] > before * threshold:
+                regressions.append((r['name'], before, r['min_us_per_op']))
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark date dimension "
+                                                 "generation")
+    parser.add_argument('names', metavar='NAME', nargs='*',
+                        help='only run benchmarks whose names contain NAME')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed runs per benchmark (default: 5)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the peak memory measurement')
+    parser.add_argument('--output', metavar='FILE',
+                        help='write the JSON results to FILE (default: stdout)')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare against the JSON results in FILE and '
+                             'exit nonzero on any regression')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown factor counted as a regression '
+                             '(default: %(default)s)')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.names, args.repeat, not args.no_memory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = find_regressions(report, json.load(f),
+                                           args.threshold)
+        for name, before, after in regressions:
+            sys.stderr.write("REGRESSION %s: %.2f -> %.2f us/op\n" %
+                             (name, before, after))
+        sys.exit(1 if regressions else 0)
@@ -15,7 +15,17 @@
 # limitations under the License.
 
 import sys
+import random
+from StringIO import StringIO
+from datetime import date, timedelta, MINYEAR, MAXYEAR
+from calendars.business_days import BusinessCalendar
+from calendars.holiday_rules import RULE_SETS, get_holiday_index
 from calendars.holidays import Holidays
+from calendars.holiday_table import HolidayTable, build_holiday_table
+from date_dimension import DateDimension, WEEK_START_WEEKDAYS
+from date_dimension_frame import DateDimensionFrame
+from date_dimension_writers import write_date_dimension
+from generate_date_dimension import generate_date_dimension
 
 
 # def iterate_calendar(start, fmt='%Y%m%d'):
@@ -30,7 +40,7 @@ from calendars.holidays import Holidays
 def display_holidays(start, end):
     """Displays the holiday names and dates in the range of years specified
     (inclusive)."""
-    for year in xrange(start, end+1):
+    for year in range(start, end+1):
         holidays = Holidays(year)
         sys.stdout.write("%d:\n" % year)  # display the year in YYYY format
         for holiday_str in [k for k in dir(holidays)
@@ -40,6 +50,251 @@ def display_holidays(start, end):
         sys.stdout.flush()
 
 
+## Reference Week Numbering ##
+#
+# The original week walks, which step back seven days at a time until they
+# leave the period. DateDimension computes the same numbers arithmetically.
+
+def walk_week_number_in_year(d):
+    y = d.year
+    w = 0
+    while d.year >= y:
+        w += 1
+        d -= timedelta(days=7)
+    return w
+
+
+def walk_week_number_in_period(d, first_month):
+    y = d.year
+    w = 0
+    while d.month >= first_month and d.year == y:
+        w += 1
+        d -= timedelta(days=7)
+    return w
+
+
+def walk_week_number_in_month(d):
+    m = d.month
+    w = 0
+    while d.month == m:
+        w += 1
+        d -= timedelta(days=7)
+    return w
+
+
+def week_number_mismatches(d):
+    """Returns the names of the week number functions whose result for d
+    differs from the reference walk."""
+    # The week functions only read their arguments, so skip building a row
+    dim = DateDimension.__new__(DateDimension)
+    h = dim.get_half_from_date(d)
+    q = dim.get_quarter_from_date(d)
+    checks = (
+        ('get_week_number_in_year', dim.get_week_number_in_year(d),
+         walk_week_number_in_year(d)),
+        ('get_week_number_in_half', dim.get_week_number_in_half(h, d),
+         walk_week_number_in_period(d, h*6-5)),
+        ('get_week_number_in_quarter', dim.get_week_number_in_quarter(q, d),
+         walk_week_number_in_period(d, q*3-2)),
+        ('get_week_number_in_month', dim.get_week_number_in_month(d),
+         walk_week_number_in_month(d)),
+    )
+    return [name for name, actual, expected in checks if actual != expected]
+
+
+def check_week_numbers(start, end, samples=None, seed=None):
+    """Compares the week numbers of every year in the range specified
+    (inclusive) against the reference walks, or of a number of randomly
+    sampled dates when samples is given. Returns the number of failures."""
+    first = date(start, 1, 1).toordinal()
+    last = date(end, 12, 31).toordinal()
+    if samples:
+        rng = random.Random(seed)
+        ordinals = (rng.randint(first, last) for i in range(samples))
+    else:
+        ordinals = range(first, last + 1)
+
+    failures = 0
+    for ordinal in ordinals:
+        d = date.fromordinal(ordinal)
+        for name in week_number_mismatches(d):
+            failures += 1
+            sys.stdout.write("%s\t%s\n" % (d.isoformat(), name))
+    sys.stdout.write("%d week number mismatches\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
+def check_week_rows(start, end):
+    """Checks that, for each week start, the rows of the years specified
+    (inclusive) sharing a week_begin_date share a week_label and a
+    week_number_in_epoch. Returns the number of failures."""
+    failures = 0
+    for week_start in sorted(WEEK_START_WEEKDAYS):
+        weeks = dict()
+        for row in generate_date_dimension(
+                date(start, 1, 1) - timedelta(days=1), date(end, 12, 31),
+                compact=True, week_start=week_start,
+                columns=['full_date', 'week_begin_date', 'week_label',
+                         'week_number_in_epoch']):
+            week = (row.week_label, row.week_number_in_epoch)
+            if weeks.setdefault(row.week_begin_date, week) != week:
+                failures += 1
+                sys.stdout.write("%s\t%s\tweek %s split\n" % (
+                    week_start, row.full_date, row.week_begin_date))
+    sys.stdout.write("%d week row mismatches\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
+## Columnar Frame ##
+
+def frame_mismatches(start, end, **options):
+    """Yields the date and column of each value DateDimensionFrame builds
+    for the years specified (inclusive) that differs, in value or type, from
+    generate_date_dimension's."""
+    first, last = date(start, 1, 1), date(end, 12, 31)
+    rows = DateDimensionFrame(first, last, **options).rows()
+    for dim in generate_date_dimension(first - timedelta(days=1), last,
+                                       **options):
+        row = next(rows, {})
+        for k in sorted(set(dim.columns) | set(row)):
+            expected, actual = dim.columns.get(k), row.get(k)
+            if actual != expected or type(actual) is not type(expected):
+                yield dim.date, k
+    for row in rows:
+        yield row['full_date'], 'extra row'
+
+
+def check_frame(start, end):
+    """Compares DateDimensionFrame against generate_date_dimension over the
+    years specified (inclusive), with weeks starting on each day supported
+    and under each holiday rule set. Returns the number of failures."""
+    options = ([dict(week_start=week_start)
+                for week_start in sorted(WEEK_START_WEEKDAYS)] +
+               [dict(rule_set=rule_set) for rule_set in sorted(RULE_SETS)])
+    failures = 0
+    for kwargs in options:
+        for d, name in frame_mismatches(start, end, **kwargs):
+            failures += 1
+            sys.stdout.write("%s\t%s\t%s\n" % (
+                ', '.join('%s=%s' % item for item in kwargs.items()), d,
+                name))
+    sys.stdout.write("%d frame mismatches\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
+## Holiday Table Round Trip ##
+
+def export(start, end, fmt, workers=None, **kwargs):
+    f = StringIO()
+    write_date_dimension(f, date(start, 1, 1) - timedelta(days=1),
+                         date(end, 12, 31), fmt, workers, **kwargs)
+    return f.getvalue()
+
+
+def check_holiday_table_export(start, end):
+    """Saves the holidays of the years specified (inclusive) as a JSON
+    HolidayTable, loads it back, and compares the SQL, COPY and CSV exports
+    made with it against those made evaluating the rules. Returns the
+    number of failures."""
+    f = StringIO()
+    build_holiday_table(start, end).dump(f)
+    f.seek(0)
+    table = HolidayTable.load(f)
+
+    failures = 0
+    for fmt in ('sql', 'copy', 'csv'):
+        expected = export(start, end, fmt)
+        Holidays.set_holiday_table(table)
+        try:
+            actual = export(start, end, fmt)
+        except Exception as e:
+            actual = repr(e)
+        finally:
+            Holidays.set_holiday_table(None)
+        if actual != expected:
+            failures += 1
+            sys.stdout.write("%s\texport differs with the loaded table\n" %
+                             fmt)
+    sys.stdout.write("%d holiday table export mismatches\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
+## Parallel Generation ##
+
+def check_parallel_export(start, end, workers=3):
+    """Compares the SQL, COPY and CSV exports of the years specified
+    (inclusive), with and without a column projection, made in worker
+    processes against those made in this one. Returns the number of
+    failures."""
+    failures = 0
+    for fmt in ('sql', 'copy', 'csv'):
+        for columns in (None, ['full_date', 'week_number_in_epoch',
+                               'holiday_name']):
+            kwargs = dict(columns=columns) if columns else dict()
+            if (export(start, end, fmt, workers, **kwargs) !=
+                    export(start, end, fmt, **kwargs)):
+                failures += 1
+                sys.stdout.write("%s\texport differs with %d workers%s\n" %
+                                 (fmt, workers,
+                                  ' and columns' if columns else ''))
+    sys.stdout.write("%d parallel export mismatches\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
+## Edge Years ##
+#
+# Holidays and business days look into the neighbouring years, which for
+# the first and last years a date can hold do not exist.
+
+def check_edge_years():
+    """Builds the holiday indexes of the first and last years under every
+    rule set, queries business calendars at date.min and date.max, and
+    initializes a DateDimension in the second and the last year. Returns
+    the number of failures."""
+    checks = []
+    for rule_set in [None] + sorted(RULE_SETS):
+        for year in (MINYEAR, MAXYEAR):
+            checks.append(('%s holidays of %d' % (rule_set, year),
+                           lambda year=year, rule_set=rule_set:
+                           get_holiday_index(year, rule_set)))
+    for rule_set in sorted(RULE_SETS):
+        calendar = BusinessCalendar(rule_set)
+        for d in (date.min, date.max):
+            checks.append(('%s business days of %s' % (rule_set, d),
+                           lambda calendar=calendar, d=d: (
+                               calendar.is_business_day(d),
+                               calendar.business_day_number_in_month(d),
+                               calendar.business_day_number_in_year(d))))
+    for d in (date(MINYEAR + 1, 6, 1), date(MAXYEAR, 6, 1)):
+        checks.append(('DateDimension(%s)' % d,
+                       lambda d=d: DateDimension(d)))
+
+    failures = 0
+    for name, check in checks:
+        try:
+            check()
+        except Exception as e:
+            failures += 1
+            sys.stdout.write("%s\t%r\n" % (name, e))
+    calendar = BusinessCalendar()
+    for d, n in ((date.max, 1), (date.min, -1)):
+        try:
+            calendar.add_business_days(d, n)
+        except OverflowError:
+            continue
+        failures += 1
+        sys.stdout.write("add_business_days(%s, %d)\tdid not overflow\n" %
+                         (d, n))
+    sys.stdout.write("%d edge year failures\n" % failures)
+    sys.stdout.flush()
+    return failures
+
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description="Process year arguments")
@@ -47,7 +302,44 @@ if __name__ == '__main__':
                         help='the first year (in YYYY format)')
     parser.add_argument('end_year', metavar='FINAL_YEAR', type=int,
                         help='the final year (in YYYY format)')
+    parser.add_argument('--weeks', action='store_true',
+                        help='check week numbering instead of listing holidays')
+    parser.add_argument('--frame', action='store_true',
+                        help='check DateDimensionFrame against the generator '
+                             'instead of listing holidays')
+    parser.add_argument('--holiday-table', action='store_true',
+                        help='check exports made with a HolidayTable loaded '
+                             'from JSON instead of listing holidays')
+    parser.add_argument('--parallel', action='store_true',
+                        help='check exports made in worker processes '
+                             'instead of listing holidays')
+    parser.add_argument('--edge-years', action='store_true',
+                        help='check holidays, business days and rows in the '
+                             'first and last years a date can hold (the year '
+                             'arguments are ignored)')
+    parser.add_argument('--samples', type=int, default=None,
+                        help='number of random dates to check with --weeks '
+                             '(default: every date)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='random seed for --samples')
     args = parser.parse_args()
+    if args.weeks:
+        failures = check_week_numbers(int(args.start_year),
+                                      int(args.end_year),
+                                      args.samples, args.seed)
+        failures += check_week_rows(int(args.start_year), int(args.end_year))
+        sys.exit(1 if failures else 0)
+    if args.frame:
+        sys.exit(1 if check_frame(int(args.start_year),
+                                  int(args.end_year)) else 0)
+    if args.holiday_table:
+        sys.exit(1 if check_holiday_table_export(int(args.start_year),
+                                                 int(args.end_year)) else 0)
+    if args.parallel:
+        sys.exit(1 if check_parallel_export(int(args.start_year),
+                                            int(args.end_year)) else 0)
+    if args.edge_years:
+        sys.exit(1 if check_edge_years() else 0)
     display_holidays(int(args.start_year), int(args.end_year))
 
 
@@ -100,14 +100,17 @@ oterms = (
     2.45
     )
 
+#// oterms in degrees
+obliqTerms = tuple(o / 3600.0 for o in oterms)
+
 def obliqeq(jd):
     v = u = (jd - J2000) / (JulianCentury * 100)
 
     eps = 23 + (26 / 60.0) + (21.448 / 3600.0)
 
     if abs(u) < 1.0:
-        for i in range(0, 10):
-            eps += (oterms[i] / 3600.0) * v
+        for o in obliqTerms:
+            eps += o * v
             v *= u
 
     return eps
@@ -249,6 +252,15 @@ nutArgCoeff = (
     -3,       0,       0,       0           #/*  2, -1,  0,  2,  2 */
     )
 
+#/* The terms flattened once: for each, the (index, multiple) pairs of
+#   its nonzero argument multiples, then its four coefficients. */
+
+nutTerms = tuple(
+    (tuple((j, nutArgMult[(i * 5) + j]) for j in range(0, 5)
+           if nutArgMult[(i * 5) + j] != 0),) +
+    nutArgCoeff[(i * 4):(i * 4) + 4]
+    for i in range(0, 63))
+
 
 
 #/*  NUTATION  --  Calculate the nutation in longitude, deltaPsi, and
@@ -291,18 +303,16 @@ def nutation(jd):
     #/* Range reduce the angles in case the sine and cosine functions
     #   don't do it as accurately or quickly. */
 
-    for i in range(0, 5):
-        ta[i] = fixangr(ta[i])
+    ta = [fixangr(a) for a in ta]
 
     to10 = t / 10.0
-    for i in range(0, 63):
+    for mults, c0, c1, c2, c3 in nutTerms:
         ang = 0
-        for j in range(0, 5):
-            if nutArgMult[(i * 5) + j] != 0:
-                ang += nutArgMult[(i * 5) + j] * ta[j]
-        dp += (nutArgCoeff[(i * 4) + 0] + nutArgCoeff[(i * 4) + 1] * to10) * sin(ang)
-        de += (nutArgCoeff[(i * 4) + 2] + nutArgCoeff[(i * 4) + 3] * to10) * cos(ang)
-    
+        for j, m in mults:
+            ang += m * ta[j]
+        dp += (c0 + c1 * to10) * sin(ang)
+        de += (c2 + c3 * to10) * cos(ang)
+
 
     #/* Return the result, converting from ten thousandths of arc
     #   seconds to radians in the process. */
@@ -358,6 +368,9 @@ EquinoxpTerms = (
     8,  15.45,  16859.074
     )
 
+#// EquinoxpTerms as (amplitude, phase, rate) triples
+EquinoxTerms = tuple(EquinoxpTerms[j:j + 3] for j in range(0, 72, 3))
+
 JDE0tab1000 = (
     (1721139.29189, 365242.13740,  0.06134,  0.00111, -0.00071),
     (1721233.25401, 365241.72562, -0.05323,  0.00907,  0.00025),
@@ -401,10 +414,8 @@ def equinox(year, which):
 
     #//  Sum the periodic terms for time T
     S = 0
-    j = 0
-    for i in range(0, 24):
-        S += EquinoxpTerms[j] * dcos(EquinoxpTerms[j + 1] + (EquinoxpTerms[j + 2] * T))
-        j += 3
+    for a, b, c in EquinoxTerms:
+        S += a * cos(((b + (c * T)) * pi) / 180.0)
 
     JDE = JDE0 + ((S * 0.00001) / deltaL)
 ##    print "year, which:", year, which
@@ -479,6 +490,16 @@ TropicalYear      = 365.24219878           #// Mean solar tropical year
 
 
 def equationOfTime(jd):
+    E = equationOfTimeAngle(jd)
+    E = E - 20.0 * (floor(E / 20.0))
+    E = E / (24 * 60)
+
+    return E
+
+
+def equationOfTimeAngle(jd):
+    #//  The equation of time in degrees, before equationOfTime's reduction;
+    #//  it lies within 720 degrees, and 4 minutes of time per degree
     tau = (jd - J2000) / JulianMillennium
     L0 = (280.4664567 + (360007.6982779 * tau) +
          (0.03032028 * tau * tau) +
@@ -487,14 +508,12 @@ def equationOfTime(jd):
          (-((tau * tau * tau * tau * tau) / 2000000)))
 
     L0 = fixangle(L0)
-    alpha = sunpos(jd)[10]
-    deltaPsi = nutation(jd)[0]
-    epsilon = obliqeq(jd) + nutation(jd)[1]
-    E = L0 + (-0.0057183) + (-alpha) + (deltaPsi * dcos(epsilon))
-    E = E - 20.0 * (floor(E / 20.0))
-    E = E / (24 * 60)
-
-    return E
+    #// One obliquity and one nutation for the date
+    epsilon0 = obliqeq(jd)
+    alpha = sunposObliq(jd, epsilon0)[10]
+    deltaPsi, deltaEpsilon = nutation(jd)
+    epsilon = epsilon0 + deltaEpsilon
+    return L0 + (-0.0057183) + (-alpha) + (deltaPsi * dcos(epsilon))
 
 
 
@@ -505,8 +524,12 @@ def sunpos(jd):
     #            which describe the tuple it returns.  We return
     #            intermediate values because they are useful in a
     #            variety of other contexts.  */
+    return sunposObliq(jd, obliqeq(jd))
 
 
+def sunposObliq(jd, epsilon0):
+    #//  SUNPOS given the obliquity of the ecliptic for jd, obliqeq(jd)
+
     T = (jd - J2000) / JulianCentury
 
     T2 = T * T
@@ -525,7 +548,6 @@ def sunpos(jd):
     sunR = ( (1.000001018 * (1 - (e * e))) / (1 + (e * dcos(sunAnomaly))) )
     Omega = 125.04 - (1934.136 * T)
     Lambda = sunLong + (-0.00569) + (-0.00478 * dsin(Omega))
-    epsilon0 = obliqeq(jd)
     epsilon = epsilon0 + (0.00256 * dcos(Omega))
     Alpha = rtd(atan2(dcos(epsilon0) * dsin(sunLong), dcos(sunLong)))
     Alpha = fixangle(Alpha)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""NumPy versions of the astro functions, for evaluating many Julian days (or
+years, for equinox and deltat) at once; a single value is an array of one.
+sunpos and nutation return structured arrays with a field for each element
+of the tuple the scalar function returns; the others return plain arrays.
+
+The periodic terms are astro's, as coefficient matrices, so each function is a
+few whole-array operations. Sums over the terms are taken in a different
+order than the scalar loops, so results agree with them to rounding, not
+bit for bit. astro's floor truncates toward zero, and so does this module's
+range reduction, so negative angles are reduced the same way."""
+
+import astro
+from astro import J2000, JulianCentury, JulianMillennium
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+NUTATION = [('deltaPsi', 'f8'), ('deltaEpsilon', 'f8')]
+SUNPOS = [('L0', 'f8'), ('M', 'f8'), ('e', 'f8'), ('C', 'f8'),
+          ('sunLong', 'f8'), ('sunAnomaly', 'f8'), ('sunR', 'f8'),
+          ('Lambda', 'f8'), ('Alpha', 'f8'), ('Delta', 'f8'),
+          ('AlphaApp', 'f8'), ('DeltaApp', 'f8')]
+
+
+## Array Helpers ##
+
+def _array(x):
+    if np is None:
+        raise ImportError("numpy is required for array astro functions")
+    return np.atleast_1d(np.asarray(x, dtype=np.float64))
+
+
+def _records(fields, *values):
+    result = np.empty(len(values[0]), dtype=fields)
+    for (name, dtype), v in zip(fields, values):
+        result[name] = v
+    return result
+
+
+def _fixangle(a):
+    return a - 360.0 * np.trunc(a / 360.0)
+
+
+def _fixangr(a):
+    return a - (2 * np.pi) * np.trunc(a / (2 * np.pi))
+
+
+def _dsin(d):
+    return np.sin(np.radians(d))
+
+
+def _dcos(d):
+    return np.cos(np.radians(d))
+
+
+_tables = dict()
+
+
+def _table(name):
+    # The coefficient matrices, built on first use so importing the module
+    # needs no numpy
+    table = _tables.get(name)
+    if table is None:
+        if name == 'nutation':
+            table = (np.array(astro.nutArgMult, dtype=np.float64)
+                     .reshape(63, 5),
+                     np.array(astro.nutArgCoeff, dtype=np.float64)
+                     .reshape(63, 4))
+        elif name == 'equinox':
+            table = np.array(astro.EquinoxTerms, dtype=np.float64)
+        elif name == 'obliqeq':
+            table = np.array(astro.obliqTerms, dtype=np.float64)
+        elif name == 'deltat':
+            table = np.array(astro.deltaTtab, dtype=np.float64)
+        table = _tables.setdefault(name, table)
+    return table
+
+
+def table_cache_clear():
+    """Forgets the coefficient matrices built so far."""
+    _tables.clear()
+
+
+## Obliquity and Nutation ##
+
+def obliqeq(jd):
+    u = (_array(jd) - J2000) / (JulianCentury * 100)
+    eps = np.empty_like(u)
+    eps.fill(23 + (26 / 60.0) + (21.448 / 3600.0))
+    # Horner's rule over u * (o0 + u * (o1 + ...)); outside the fit the
+    # J2000 value stands
+    terms = _table('obliqeq')
+    inside = np.abs(u) < 1.0
+    v = u[inside]
+    poly = np.zeros_like(v)
+    for o in terms[::-1]:
+        poly = (poly + o) * v
+    eps[inside] += poly
+    return eps
+
+
+def _nutation(jd):
+    mults, coeffs = _table('nutation')
+    t = (jd - 2451545.0) / 36525.0
+    t2 = t * t
+    t3 = t * t2
+    ta = _fixangr(np.radians(np.array([
+        297.850363 + 445267.11148 * t - 0.0019142 * t2 + t3 / 189474.0,
+        357.52772 + 35999.05034 * t - 0.0001603 * t2 - t3 / 300000.0,
+        134.96298 + 477198.867398 * t + 0.0086972 * t2 + t3 / 56250.0,
+        93.27191 + 483202.017538 * t - 0.0036825 * t2 + t3 / 327270.0,
+        125.04452 - 1934.136261 * t + 0.0020708 * t2 + t3 / 450000.0])))
+    # One row of arguments per term, one column per day
+    ang = mults.dot(ta)
+    to10 = t / 10.0
+    dp = ((coeffs[:, 0:1] + coeffs[:, 1:2] * to10) * np.sin(ang)).sum(axis=0)
+    de = ((coeffs[:, 2:3] + coeffs[:, 3:4] * to10) * np.cos(ang)).sum(axis=0)
+    return dp / (3600.0 * 10000.0), de / (3600.0 * 10000.0)
+
+
+def nutation(jd):
+    """Returns deltaPsi and deltaEpsilon, in degrees, for each day."""
+    return _records(NUTATION, *_nutation(_array(jd)))
+
+
+## Sun ##
+
+def _sunpos(jd, epsilon0):
+    T = (jd - J2000) / JulianCentury
+    T2 = T * T
+    L0 = _fixangle(280.46646 + (36000.76983 * T) + (0.0003032 * T2))
+    M = _fixangle(357.52911 + (35999.05029 * T) + (-0.0001537 * T2))
+    e = 0.016708634 + (-0.000042037 * T) + (-0.0000001267 * T2)
+    C = (((1.914602 + (-0.004817 * T) + (-0.000014 * T2)) * _dsin(M)) +
+         ((0.019993 - (0.000101 * T)) * _dsin(2 * M)) +
+         (0.000289 * _dsin(3 * M)))
+    sunLong = L0 + C
+    sunAnomaly = M + C
+    sunR = (1.000001018 * (1 - (e * e))) / (1 + (e * _dcos(sunAnomaly)))
+    Omega = 125.04 - (1934.136 * T)
+    Lambda = sunLong + (-0.00569) + (-0.00478 * _dsin(Omega))
+    epsilon = epsilon0 + (0.00256 * _dcos(Omega))
+    Alpha = _fixangle(np.degrees(np.arctan2(
+        _dcos(epsilon0) * _dsin(sunLong), _dcos(sunLong))))
+    Delta = np.degrees(np.arcsin(_dsin(epsilon0) * _dsin(sunLong)))
+    AlphaApp = _fixangle(np.degrees(np.arctan2(
+        _dcos(epsilon) * _dsin(Lambda), _dcos(Lambda))))
+    DeltaApp = np.degrees(np.arcsin(_dsin(epsilon) * _dsin(Lambda)))
+    return (L0, M, e, C, sunLong, sunAnomaly, sunR, Lambda, Alpha, Delta,
+            AlphaApp, DeltaApp)
+
+
+def sunpos(jd):
+    """Returns the elements of astro.sunpos for each day."""
+    jd = _array(jd)
+    return _records(SUNPOS, *_sunpos(jd, obliqeq(jd)))
+
+
+def equationOfTime(jd):
+    E = equationOfTimeAngle(jd)
+    E = E - 20.0 * np.trunc(E / 20.0)
+    return E / (24 * 60)
+
+
+def equationOfTimeAngle(jd):
+    """Returns astro.equationOfTimeAngle, in degrees, for each day."""
+    jd = _array(jd)
+    tau = (jd - J2000) / JulianMillennium
+    tau2 = tau * tau
+    tau3 = tau2 * tau
+    tau4 = tau3 * tau
+    tau5 = tau4 * tau
+    L0 = _fixangle(280.4664567 + (360007.6982779 * tau) +
+                   (0.03032028 * tau2) + (tau3 / 49931) +
+                   (-(tau4 / 15300)) + (-(tau5 / 2000000)))
+    epsilon0 = obliqeq(jd)
+    alpha = _sunpos(jd, epsilon0)[10]
+    deltaPsi, deltaEpsilon = _nutation(jd)
+    epsilon = epsilon0 + deltaEpsilon
+    return L0 + (-0.0057183) + (-alpha) + (deltaPsi * _dcos(epsilon))
+
+
+## Equinoxes and Delta T ##
+
+def equinox(year, which):
+    """Returns the Julian Ephemeris Day of the equinox or solstice (which
+    is 0 to 3, as for astro.equinox) of each year."""
+    year, which = np.broadcast_arrays(_array(year), np.asarray(which))
+    shape = year.shape
+    year, which = year.ravel(), which.ravel()
+    JDE0tab = np.where((year < 1000)[:, np.newaxis],
+                       np.array(astro.JDE0tab1000)[which],
+                       np.array(astro.JDE0tab2000)[which])
+    Y = np.where(year < 1000, year / 1000.0, (year - 2000) / 1000.0)
+    JDE0 = (JDE0tab[:, 0] + JDE0tab[:, 1] * Y + JDE0tab[:, 2] * Y * Y +
+            JDE0tab[:, 3] * Y * Y * Y + JDE0tab[:, 4] * Y * Y * Y * Y)
+    T = (JDE0 - 2451545.0) / 36525
+    W = (35999.373 * T) - 2.47
+    deltaL = 1 + (0.0334 * _dcos(W)) + (0.0007 * _dcos(2 * W))
+    terms = _table('equinox')
+    S = (terms[:, 0:1] * _dcos(terms[:, 1:2] + terms[:, 2:3] * T)).sum(axis=0)
+    return (JDE0 + ((S * 0.00001) / deltaL)).reshape(shape)
+
+
+def deltat(year):
+    """Returns astro.deltat of each year. Whole years are divided as the
+    scalar function divides Python ints, rounding down."""
+    year = np.atleast_1d(year)
+    if year.dtype.kind not in 'iu':
+        return _deltat(_array(year), np.true_divide)
+    return _deltat(year, np.floor_divide)
+
+
+def _deltat(year, divide):
+    table = _table('deltat')
+    in_table = (year >= 1620) & (year <= 2000)
+    y = np.clip(year, 1620, 2000) - 1620
+    i = np.trunc(divide(y, 2)).astype(np.int64)
+    f = divide(y, 2) - i
+    tabulated = table[i] + (table[np.minimum(i + 1, len(table) - 1)] -
+                            table[i]) * f
+    t = divide(year - 2000, 100)
+    early = 2177 + (497 * t) + (44.1 * t * t)
+    late = 102 + (102 * t) + (25.3 * t * t)
+    late = late + np.where((year > 2000) & (year < 2100),
+                           0.37 * (year - 2100), 0)
+    return np.where(in_table, tabulated,
+                    np.where(year < 948, early, late)).astype(np.float64)
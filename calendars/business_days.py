@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Business day arithmetic. A BusinessCalendar keeps, over a span of whole
+years, a prefix sum of business days by ordinal and the ordinal of every
+business day, so that counting business days between two dates is O(1) and
+stepping n business days from a date is O(1) as well."""
+
+import threading
+from array import array
+from datetime import date, MINYEAR, MAXYEAR
+from holidays import SAT, SUN
+from holiday_rules import get_rule_set, get_holiday_index
+
+
+# Holidays that close businesses; the Holidays class also has observances
+# such as Groundhog Day, which are not days off
+DEFAULT_RULE_SET = 'us_federal'
+DEFAULT_WEEKEND = (SAT, SUN)
+
+
+class BusinessCalendar(object):
+    """Business days are the days not in weekend (MON..SUN weekdays) and
+    not holidays of the rule set. The covered span grows on demand, under a
+    lock, so a calendar may be shared by threads."""
+
+    def __init__(self, rule_set=DEFAULT_RULE_SET, weekend=DEFAULT_WEEKEND):
+        self.rule_set = get_rule_set(rule_set)
+        self.weekend = frozenset(weekend)
+        self.first_year = None
+        self.last_year = None
+        self.first_ordinal = None
+        # flags[i] is 1 if first_ordinal + i is a business day
+        self.flags = bytearray()
+        # counts[i] is the number of business days before first_ordinal + i
+        self.counts = array('i', [0])
+        self.ordinals = array('i')
+        self._lock = threading.Lock()
+
+    def _year_flags(self, year):
+        holidays = get_holiday_index(year, self.rule_set)
+        first = date(year, 1, 1).toordinal()
+        last = date(year, 12, 31).toordinal()
+        # 1 Jan 1 (ordinal 1) was a Monday
+        return bytearray(
+            0 if (o - 1) % 7 in self.weekend or date.fromordinal(o) in holidays
+            else 1
+            for o in range(first, last + 1))
+
+    def cover(self, first_year, last_year):
+        """Extends the span to include first_year through last_year."""
+        with self._lock:
+            self._cover(first_year, last_year)
+
+    def _cover(self, first_year, last_year):
+        if self.first_year is None:
+            flags = bytearray()
+            for year in range(first_year, last_year + 1):
+                flags += self._year_flags(year)
+        elif first_year >= self.first_year and last_year <= self.last_year:
+            return
+        else:
+            flags = bytearray()
+            for year in range(first_year, self.first_year):
+                flags += self._year_flags(year)
+            flags += self.flags
+            for year in range(self.last_year + 1, last_year + 1):
+                flags += self._year_flags(year)
+            first_year = min(first_year, self.first_year)
+            last_year = max(last_year, self.last_year)
+        self.flags = flags
+        self.first_year = first_year
+        self.last_year = last_year
+        self.first_ordinal = date(first_year, 1, 1).toordinal()
+
+        counts = array('i', [0]) * (len(flags) + 1)
+        ordinals = array('i')
+        n = 0
+        for i, flag in enumerate(flags):
+            if flag:
+                ordinals.append(self.first_ordinal + i)
+                n += 1
+            counts[i + 1] = n
+        self.counts = counts
+        self.ordinals = ordinals
+
+    def _grow(self, year):
+        # Doubling the span keeps repeated growth linear overall, up to the
+        # years date can hold
+        if not MINYEAR <= year <= MAXYEAR:
+            raise OverflowError("date value out of range")
+        if self.first_year is None:
+            self._cover(year, year)
+            return
+        span = self.last_year - self.first_year + 1
+        if year < self.first_year:
+            self._cover(max(min(year, self.first_year - span), MINYEAR),
+                        self.last_year)
+        elif year > self.last_year:
+            self._cover(self.first_year,
+                        min(max(year, self.last_year + span), MAXYEAR))
+
+    def _index(self, ordinal):
+        """Returns the index of ordinal into flags, growing the span to
+        cover it. The day after date.max indexes only counts, as the end of
+        the span."""
+        i = ordinal - (self.first_ordinal or 0)
+        if self.first_year is None or i < 0 or i >= len(self.flags):
+            last = min(ordinal, date.max.toordinal())
+            self._grow(date.fromordinal(last).year)
+            i = ordinal - self.first_ordinal
+        return i
+
+    def _count_before(self, ordinal):
+        # _index may replace counts, so it is looked up afterwards
+        i = self._index(ordinal)
+        return self.counts[i]
+
+    def _count_between(self, first, last):
+        # Both ends are covered before either count is read, since growing
+        # the span backwards shifts every count
+        self._index(first)
+        self._index(last)
+        return (self.counts[last - self.first_ordinal] -
+                self.counts[first - self.first_ordinal])
+
+    def _business_day(self, k):
+        # The ordinal of the kth (0-based) business day of the span, growing
+        # it as needed; days added before the span shift k with them
+        while k >= len(self.ordinals):
+            self._grow(self.last_year + 1)
+        while k < 0:
+            previous = len(self.ordinals)
+            self._grow(self.first_year - 1)
+            k += len(self.ordinals) - previous
+        return self.ordinals[k]
+
+    ## Queries ##
+
+    def is_business_day(self, d):
+        with self._lock:
+            # _index may replace flags, so it is looked up afterwards
+            i = self._index(d.toordinal())
+            return bool(self.flags[i])
+
+    def business_days_between(self, start, end):
+        """Returns the number of business days from start up to, but not
+        including, end; negative if end is before start."""
+        with self._lock:
+            return self._count_between(start.toordinal(), end.toordinal())
+
+    def add_business_days(self, d, n):
+        """Returns the date n business days after d (before it, if n is
+        negative). d need not be a business day; adding 0 returns d if it
+        is one and the next business day if it is not."""
+        ordinal = d.toordinal()
+        with self._lock:
+            if n > 0:
+                k = self._count_before(ordinal + 1) + n - 1
+            else:
+                k = self._count_before(ordinal) + n
+            return date.fromordinal(self._business_day(k))
+
+    def next_business_day(self, d):
+        """Returns the first business day after d."""
+        return self.add_business_days(d, 1)
+
+    def previous_business_day(self, d):
+        """Returns the last business day before d."""
+        return self.add_business_days(d, -1)
+
+    def business_day_number_in_month(self, d):
+        """Returns the number of business days in d's month up to and
+        including d, so the first business day of the month is 1."""
+        with self._lock:
+            return self._count_between(date(d.year, d.month, 1).toordinal(),
+                                       d.toordinal() + 1)
+
+    def business_day_number_in_year(self, d):
+        """Returns the number of business days in d's year up to and
+        including d, so the first business day of the year is 1."""
+        with self._lock:
+            return self._count_between(date(d.year, 1, 1).toordinal(),
+                                       d.toordinal() + 1)
+
+
+_calendars = dict()
+
+
+def get_business_calendar(rule_set=DEFAULT_RULE_SET):
+    """Returns the shared BusinessCalendar of the rule set (or its name)
+    with a Saturday and Sunday weekend."""
+    rule_set = get_rule_set(rule_set)
+    try:
+        return _calendars[rule_set]
+    except KeyError:
+        # setdefault keeps one calendar should two threads get here at once
+        return _calendars.setdefault(rule_set, BusinessCalendar(rule_set))
+
+
+get_business_calendar.cache_clear = _calendars.clear
@@ -116,9 +116,29 @@ def hebrew_year_months(year):
         return 12
 
 
+# Per-Hebrew-year caches, so that converting any number of dates in a year
+# evaluates the new year delays and month lengths only once
+_hebrew_delay_1_cache = {}
+_hebrew_year_base_cache = {}
+_hebrew_month_days_cache = {}
+_hebrew_month_offsets_cache = {}
+
+
+def hebrew_cache_clear():
+    #//  Empty the per-Hebrew-year caches
+    for cache in (_hebrew_delay_1_cache, _hebrew_year_base_cache,
+                  _hebrew_month_days_cache, _hebrew_month_offsets_cache):
+        cache.clear()
+
+
 def hebrew_delay_1(year):
     #//  Test for delay of start of new year and to avoid
     #//  Sunday, Wednesday, and Friday as start of the new year.
+    try:
+        return _hebrew_delay_1_cache[year]
+    except KeyError:
+        pass
+
     months = ((235 * year) - 234) / 19
     parts = 12084 + (13753 * months)
     day = (months * 29) + parts / 25920
@@ -126,6 +146,7 @@ def hebrew_delay_1(year):
     if mod((3 * (day + 1)), 7) < 3:
         day += 1
 
+    _hebrew_delay_1_cache[year] = day
     return day
 
 
@@ -145,14 +166,22 @@ def hebrew_delay_2(year):
         return 0
 
 
+def hebrew_year_base(year):
+    #//  Julian day before 1 Tishri, the first day of the year
+    try:
+        return _hebrew_year_base_cache[year]
+    except KeyError:
+        base = HEBREW_EPOCH + hebrew_delay_1(year) + hebrew_delay_2(year) + 1
+        _hebrew_year_base_cache[year] = base
+        return base
+
+
 def hebrew_year_days(year):
     #//  How many days are in a Hebrew year ?
-    return hebrew_to_jd(year + 1, 7, 1) - hebrew_to_jd(year, 7, 1)
+    return hebrew_year_base(year + 1) - hebrew_year_base(year)
 
 
-def hebrew_month_days(year, month):
-    #//  How many days are in a given month of a given year{
-
+def _hebrew_month_days(year, month):
     #//  First of all, dispose of fixed-length 29 day months
     if month in (2,4,6,10,13):
         return 29
@@ -175,22 +204,46 @@ def hebrew_month_days(year, month):
     return 30
 
 
-
-def hebrew_to_jd(year, month, day):
-    months = hebrew_year_months(year);
-    jd = HEBREW_EPOCH + hebrew_delay_1(year) + hebrew_delay_2(year) + day + 1
-
+def hebrew_month_days(year, month):
+    #//  How many days are in a given month of a given year
+    try:
+        return _hebrew_month_days_cache[year][month]
+    except KeyError:
+        _hebrew_month_days_cache[year] = tuple(
+            _hebrew_month_days(year, mon) for mon in range(0, 14))
+    except IndexError:
+        return _hebrew_month_days(year, month)
+    return _hebrew_month_days_cache[year][month]
+
+
+def _hebrew_month_offset(year, month):
+    #//  Days from 1 Tishri to the first of the month; the year begins in
+    #//  Tishri (7), so Nisan (1) through Elul (6) follow Adar
+    months = hebrew_year_months(year)
+    offset = 0
     if month < 7 :
         for mon in range (7, months+1):
-            jd +=  hebrew_month_days(year, mon)
+            offset +=  hebrew_month_days(year, mon)
 
         for mon in range(1, month):
-            jd +=  hebrew_month_days(year, mon)
+            offset +=  hebrew_month_days(year, mon)
     else:
         for mon in range(7, month):
-            jd += hebrew_month_days(year, mon)
+            offset += hebrew_month_days(year, mon)
 
-    return jd
+    return offset
+
+
+def hebrew_to_jd(year, month, day):
+    try:
+        offsets = _hebrew_month_offsets_cache[year]
+    except KeyError:
+        offsets = _hebrew_month_offsets_cache[year] = tuple(
+            _hebrew_month_offset(year, mon) for mon in range(0, 14))
+
+    if 0 <= month < 14:
+        return hebrew_year_base(year) + day + offsets[month]
+    return hebrew_year_base(year) + day + _hebrew_month_offset(year, month)
 
 
 def jd_to_hebrew(jd):
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""NumPy versions of the calendar_util jd_to_* converters. Each takes an
+array of Julian days, a single day being an array of one, and returns a
+structured array with a field for each element of the tuple the scalar
+converter returns, e.g. year, month and day.
+
+The arithmetic calendars are the scalar formulas applied to whole arrays.
+Hebrew and Persian dates are looked up in tables of the first day of every
+month of the years spanned, built once per year from the scalar *_to_jd
+functions, rather than searched for a date at a time.
+
+calendar_util's floor truncates toward zero, so its results where
+intermediate values go negative (before 1 CE, or before the Islamic epoch)
+are not reproduced. Nor is jd_to_persian's before Persian year 475, which
+persian_to_jd disagrees with; the table agrees with persian_to_jd."""
+
+import calendar_util
+from calendar_util import (GREGORIAN_EPOCH, HEBREW_EPOCH, ISLAMIC_EPOCH,
+                           PERSIAN_EPOCH, MAYAN_COUNT_EPOCH, BAHAI_EPOCH)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+YMD = [('year', 'i8'), ('month', 'i8'), ('day', 'i8')]
+ISO_WEEK = [('year', 'i8'), ('week', 'i8'), ('day', 'i8')]
+MAYAN_COUNT = [('baktun', 'i8'), ('katun', 'i8'), ('tun', 'i8'),
+               ('uinal', 'i8'), ('kin', 'i8')]
+MAYAN_HAAB = [('month', 'i8'), ('day', 'i8')]
+MAYAN_TZOLKIN = [('name', 'i8'), ('number', 'i8')]
+BAHAI = [('major', 'i8'), ('cycle', 'i8'), ('year', 'i8'), ('month', 'i8'),
+         ('day', 'i8')]
+
+
+## Array Helpers ##
+
+def _jd_array(jd):
+    if np is None:
+        raise ImportError("numpy is required for array calendar conversions")
+    return np.atleast_1d(np.asarray(jd, dtype=np.float64))
+
+
+def _records(fields, *values):
+    result = np.empty(len(values[0]), dtype=fields)
+    for (name, dtype), v in zip(fields, values):
+        result[name] = v
+    return result
+
+
+def _floor(x):
+    return np.floor(x).astype(np.int64)
+
+
+def _ceil(x):
+    return np.ceil(x).astype(np.int64)
+
+
+def _midnight(jd):
+    # The scalar converters' floor(jd) + 0.5, as a whole day number
+    return _floor(jd)
+
+
+def leap_gregorian(year):
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def gregorian_to_jd(year, month, day):
+    y1 = year - 1
+    leap_adj = np.where(month <= 2, 0, np.where(leap_gregorian(year), -1, -2))
+    return ((GREGORIAN_EPOCH - 1) + 365 * y1 + y1 // 4 - y1 // 100 +
+            y1 // 400 + (367 * month - 362) // 12 + leap_adj + day)
+
+
+## Gregorian, Julian and ISO ##
+
+def jd_to_gregorian(jd):
+    jd = _jd_array(jd)
+    # Whole days since the Gregorian epoch
+    depoch = _floor(jd - 0.5) - int(GREGORIAN_EPOCH - 0.5)
+    quadricent = depoch // 146097
+    dqc = depoch % 146097
+    cent = dqc // 36524
+    dcent = dqc % 36524
+    quad = dcent // 1461
+    dquad = dcent % 1461
+    yindex = dquad // 365
+    year = quadricent * 400 + cent * 100 + quad * 4 + yindex
+    year += ~((cent == 4) | (yindex == 4))
+
+    wjd = depoch + GREGORIAN_EPOCH
+    yearday = (wjd - gregorian_to_jd(year, 1, 1)).astype(np.int64)
+    leap_adj = np.where(wjd < gregorian_to_jd(year, 3, 1), 0,
+                        np.where(leap_gregorian(year), 1, 2))
+    month = ((yearday + leap_adj) * 12 + 373) // 367
+    day = (wjd - gregorian_to_jd(year, month, 1)).astype(np.int64) + 1
+    return _records(YMD, year, month, day)
+
+
+def jd_to_julian(jd):
+    td = _jd_array(jd) + 0.5
+    b = _floor(td) + 1524
+    c = _floor((b - 122.1) / 365.25)
+    d = _floor(365.25 * c)
+    e = _floor((b - d) / 30.6001)
+    month = np.where(e < 14, e - 1, e - 13)
+    year = np.where(month > 2, c - 4716, c - 4715)
+    day = b - d - _floor(30.6001 * e)
+    # There is no year 0; 1 BCE is year -1
+    year = np.where(year < 1, year - 1, year)
+    return _records(YMD, year, month, day)
+
+
+def _iso_first_day(year):
+    # iso_to_julian(year, 1, 1): the Monday of the week of 4 Jan
+    jd = gregorian_to_jd(year - 1, 12, 28) - 1
+    return jd - _floor(jd + 1.5) % 7 + 8
+
+
+def jd_to_iso(jd):
+    jd = _jd_array(jd)
+    year = jd_to_gregorian(jd - 3)['year']
+    year += jd >= _iso_first_day(year + 1)
+    week = _floor((jd - _iso_first_day(year)) / 7) + 1
+    day = _floor(jd + 1.5) % 7
+    return _records(ISO_WEEK, year, week, np.where(day == 0, 7, day))
+
+
+## Islamic ##
+
+def islamic_to_jd(year, month, day):
+    return (day + _ceil(29.5 * (month - 1)) + (year - 1) * 354 +
+            (3 + 11 * year) // 30 + ISLAMIC_EPOCH - 1)
+
+
+def jd_to_islamic(jd):
+    jd = _midnight(_jd_array(jd)) + 0.5
+    year = _floor((30 * (jd - ISLAMIC_EPOCH) + 10646) / 10631)
+    month = np.minimum(
+        12, _ceil((jd - (29 + islamic_to_jd(year, 1, 1))) / 29.5) + 1)
+    day = (jd - islamic_to_jd(year, month, 1)).astype(np.int64) + 1
+    return _records(YMD, year, month, day)
+
+
+## Month Tables ##
+
+class _MonthTable(object):
+    # The first day of every month of a calendar's years, in order, so that
+    # a date's month is found by binary search
+    def __init__(self, month_starts, year_of):
+        # month_starts(year) returns ((month, jd of its first day), ...)
+        # in the order the months fall in the year, and year_of(jd) the
+        # year of jd to within one
+        self.month_starts = month_starts
+        self.year_of = year_of
+        self._years = dict()
+
+    def lookup(self, jd):
+        jd = _midnight(_jd_array(jd)) + 0.5
+        if not len(jd):
+            return _records(YMD, jd, jd, jd)
+        years, months, starts = [], [], []
+        for year in range(self.year_of(jd.min()) - 1,
+                          self.year_of(jd.max()) + 2):
+            year_starts = self._years.get(year)
+            if year_starts is None:
+                year_starts = self._years[year] = self.month_starts(year)
+            for month, start in year_starts:
+                years.append(year)
+                months.append(month)
+                starts.append(start)
+        starts = np.array(starts)
+        i = np.searchsorted(starts, jd, side='right') - 1
+        day = (jd - starts[i]).astype(np.int64) + 1
+        return _records(YMD, np.array(years)[i], np.array(months)[i], day)
+
+
+def _hebrew_year_of(jd):
+    # jd_to_hebrew's first guess, which is at most a year early
+    return int((jd - HEBREW_EPOCH) * 98496.0 / 35975351.0)
+
+
+def _hebrew_month_starts(year):
+    # The year begins with Tishri (7); Nisan (1) through Elul (6) follow
+    # the last month, Adar (12) or Adar II (13)
+    months = calendar_util.hebrew_year_months(year)
+    return tuple((month, calendar_util.hebrew_to_jd(year, month, 1))
+                 for month in range(7, months + 1) + range(1, 7))
+
+
+def _persian_year_of(jd):
+    year = int(np.floor((jd - PERSIAN_EPOCH) / 365.2422)) + 1
+    # There is no year 0; 1 AP follows -1
+    return year if year > 0 else year - 1
+
+
+def _persian_month_starts(year):
+    if year == 0:
+        return ()
+    return tuple((month, calendar_util.persian_to_jd(year, month, 1))
+                 for month in range(1, 13))
+
+
+_hebrew_months = _MonthTable(_hebrew_month_starts, _hebrew_year_of)
+_persian_months = _MonthTable(_persian_month_starts, _persian_year_of)
+
+
+def month_cache_clear():
+    """Forgets the Hebrew and Persian months looked up so far."""
+    _hebrew_months._years.clear()
+    _persian_months._years.clear()
+
+
+def jd_to_hebrew(jd):
+    return _hebrew_months.lookup(jd)
+
+
+def jd_to_persian(jd):
+    return _persian_months.lookup(jd)
+
+
+## Indian Civil ##
+
+def jd_to_indian_civil(jd):
+    jd = _midnight(_jd_array(jd)) + 0.5
+    gyear = jd_to_gregorian(jd)['year']
+    caitra = np.where(leap_gregorian(gyear), 31, 30)
+    # Day number in the Gregorian year, and the Saka year it falls in
+    yday = (jd - gregorian_to_jd(gyear, 1, 1)).astype(np.int64)
+    year = gyear - 78
+    before = yday < 80
+    # Days before the Saka new year belong to the end of the previous one
+    year = np.where(before, year - 1, year)
+    yday = np.where(before, yday + caitra + 31 * 5 + 30 * 3 + 10 + 80, yday)
+    yday -= 80
+
+    mday = yday - caitra
+    late = mday >= 31 * 5
+    month = np.where(yday < caitra, 1,
+                     np.where(late, (mday - 31 * 5) // 30 + 7, mday // 31 + 2))
+    day = np.where(yday < caitra, yday + 1,
+                   np.where(late, (mday - 31 * 5) % 30 + 1, mday % 31 + 1))
+    return _records(YMD, year, month, day)
+
+
+## Mayan ##
+
+def jd_to_mayan_count(jd):
+    d = _jd_array(jd) - MAYAN_COUNT_EPOCH
+    baktun = _floor(d / 144000)
+    d = d % 144000
+    katun = _floor(d / 7200)
+    d = d % 7200
+    tun = _floor(d / 360)
+    d = d % 360
+    uinal = _floor(d / 20)
+    kin = (d % 20).astype(np.int64)
+    return _records(MAYAN_COUNT, baktun, katun, tun, uinal, kin)
+
+
+def jd_to_mayan_haab(jd):
+    lcount = _jd_array(jd) - MAYAN_COUNT_EPOCH
+    day = (lcount + 8 + (18 - 1) * 20) % 365
+    return _records(MAYAN_HAAB, _floor(day / 20) + 1,
+                    (day % 20).astype(np.int64))
+
+
+def jd_to_mayan_tzolkin(jd):
+    lcount = _jd_array(jd) - MAYAN_COUNT_EPOCH
+    # amod: a modulus of 0 is the modulus itself
+    return _records(MAYAN_TZOLKIN,
+                    ((lcount + 20 - 1) % 20 + 1).astype(np.int64),
+                    ((lcount + 4 - 1) % 13 + 1).astype(np.int64))
+
+
+## Bahai ##
+
+# The Gregorian year of the Bahai epoch
+BAHAI_EPOCH_YEAR = calendar_util.jd_to_gregorian(BAHAI_EPOCH)[0]
+
+
+def bahai_to_jd(major, cycle, year, month, day):
+    gy = 361 * (major - 1) + 19 * (cycle - 1) + (year - 1) + BAHAI_EPOCH_YEAR
+    # The intercalary days before the last month
+    m = np.where(month != 20, 0,
+                 np.where(leap_gregorian(gy + 1), -14, -15))
+    return gregorian_to_jd(gy, 3, 20) + 19 * (month - 1) + m + day
+
+
+def jd_to_bahai(jd):
+    jd = _midnight(_jd_array(jd)) + 0.5
+    gy = jd_to_gregorian(jd)['year']
+    bys = gy - (BAHAI_EPOCH_YEAR +
+                ((gregorian_to_jd(gy, 1, 1) <= jd) &
+                 (jd <= gregorian_to_jd(gy, 3, 20))))
+    major = bys // 361 + 1
+    cycle = bys % 361 // 19 + 1
+    year = bys % 19 + 1
+    days = jd - bahai_to_jd(major, cycle, year, 1, 1)
+    month = np.where(jd >= bahai_to_jd(major, cycle, year, 20, 1), 20,
+                     _floor(days / 19) + 1)
+    day = (jd + 1 - bahai_to_jd(major, cycle, year, month, 1)).astype(np.int64)
+    return _records(BAHAI, major, cycle, year, month, day)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Declarative holiday rule sets for individual markets. A HolidayRuleSet
+compiles its rules once per year into a {date: [holiday names]} index, the
+same shape Holidays.get_holiday_index returns, so either can supply the
+holiday columns of a date dimension."""
+
+import calendar
+import calendar_util
+from datetime import date, timedelta, MINYEAR, MAXYEAR
+from holidays import (Holidays, NO_HOLIDAY, JAN, FEB, MAY, JUN, JUL, AUG, SEP,
+                      OCT, NOV, DEC, MON, THU, SAT, SUN, NISAN, TISHRI,
+                      KISLEV, HEBREW_YEAR_OFFSET)
+
+MIN_ORDINAL = date.min.toordinal()
+MAX_ORDINAL = date.max.toordinal()
+
+
+## Rules ##
+
+class HolidayRule(object):
+    """A named holiday falling on at most one date a year. observance, if
+    given, moves a date falling on a weekend (see the observances below);
+    first_year and last_year bound the years the rule applies to."""
+
+    def __init__(self, name, observance=None, first_year=None,
+                 last_year=None):
+        self.name = name
+        self.observance = observance
+        self.first_year = first_year
+        self.last_year = last_year
+
+    def applies(self, year):
+        return ((self.first_year is None or year >= self.first_year) and
+                (self.last_year is None or year <= self.last_year))
+
+    def get_date(self, year):
+        raise NotImplementedError
+
+
+class FixedDate(HolidayRule):
+    """The same month and day every year."""
+
+    def __init__(self, name, month, day, **kwargs):
+        super(FixedDate, self).__init__(name, **kwargs)
+        self.month = month
+        self.day = day
+
+    def get_date(self, year):
+        return date(year, self.month, self.day)
+
+
+class NthWeekday(HolidayRule):
+    """The nth weekday (MON..SUN) of a month, e.g. the 3rd Monday."""
+
+    def __init__(self, name, n, weekday, month, **kwargs):
+        super(NthWeekday, self).__init__(name, **kwargs)
+        self.n = n
+        self.weekday = weekday
+        self.month = month
+
+    def get_date(self, year):
+        first_weekday = calendar.monthrange(year, self.month)[0]
+        return date(year, self.month,
+                    (self.weekday - first_weekday) % 7 + 1 + (self.n - 1)*7)
+
+
+class LastWeekday(HolidayRule):
+    """The last weekday (MON..SUN) of a month, e.g. the last Monday."""
+
+    def __init__(self, name, weekday, month, **kwargs):
+        super(LastWeekday, self).__init__(name, **kwargs)
+        self.weekday = weekday
+        self.month = month
+
+    def get_date(self, year):
+        days_in_month = calendar.monthrange(year, self.month)[1]
+        last_day = date(year, self.month, days_in_month)
+        return last_day - timedelta(days=(last_day.weekday() - self.weekday) % 7)
+
+
+def easter(year):
+    """Western (Gregorian) Easter Sunday of the year."""
+    return Holidays(year).holiday_easter()[0]
+
+
+class EasterRelative(HolidayRule):
+    """A number of days before (negative) or after Easter Sunday."""
+
+    def __init__(self, name, days, **kwargs):
+        super(EasterRelative, self).__init__(name, **kwargs)
+        self.days = days
+
+    def get_date(self, year):
+        return easter(year) + timedelta(days=self.days)
+
+
+class HebrewRelative(HolidayRule):
+    """A number of days from a Hebrew calendar month and day, taking the
+    Hebrew year in which the result falls in the Gregorian year."""
+
+    def __init__(self, name, hebrew_month, hebrew_day, days=0, **kwargs):
+        super(HebrewRelative, self).__init__(name, **kwargs)
+        self.hebrew_month = hebrew_month
+        self.hebrew_day = hebrew_day
+        self.days = days
+
+    def get_date(self, year):
+        for hebrew_year in (year + HEBREW_YEAR_OFFSET,
+                            year + HEBREW_YEAR_OFFSET + 1):
+            # By ordinal, which unlike jd_to_gregorian holds in 1 CE too
+            ordinal = int(calendar_util.hebrew_to_jd(
+                hebrew_year, self.hebrew_month, self.hebrew_day) -
+                calendar_util.GREGORIAN_EPOCH) + 1 + self.days
+            if MIN_ORDINAL <= ordinal <= MAX_ORDINAL:
+                d = date.fromordinal(ordinal)
+                if d.year == year:
+                    return d
+        return None
+
+
+## Observances ##
+#
+# Each takes the date a rule gives and the weekdays already taken by the rule
+# set's other holidays, and returns the day the holiday is observed.
+
+def nearest_weekday(d, taken):
+    """Saturday holidays are observed on Friday, Sunday ones on Monday."""
+    if d.weekday() == SAT:
+        return d - timedelta(days=1)
+    elif d.weekday() == SUN:
+        return d + timedelta(days=1)
+    return d
+
+
+def sunday_to_monday(d, taken):
+    """Sunday holidays are observed on Monday; Saturday ones are lost."""
+    if d.weekday() == SUN:
+        return d + timedelta(days=1)
+    return d
+
+
+def next_free_weekday(d, taken):
+    """Weekend holidays are observed on the next weekday that is not
+    already a holiday, as UK substitute days are."""
+    if d.weekday() < SAT:
+        return d
+    while d.weekday() in (SAT, SUN) or d in taken:
+        d += timedelta(days=1)
+    return d
+
+
+## Rule Sets ##
+
+class HolidayRuleSet(object):
+    """A named list of HolidayRules. A holiday observed on a day other than
+    its own adds a second entry, named by observed_format, on that day."""
+
+    def __init__(self, name, rules, observed_format='%s (Observed)'):
+        self.name = name
+        self.rules = tuple(rules)
+        self.observed_format = observed_format
+        self._index_cache = dict()
+
+    def __repr__(self):
+        return '<HolidayRuleSet %s>' % self.name
+
+    def compile_year(self, year):
+        """Returns [(date, name)] for the holidays the rules give for the
+        year, observed days included, in rule order."""
+        holidays = []
+        observed = []
+        for rule in self.rules:
+            if not rule.applies(year):
+                continue
+            d = rule.get_date(year)
+            if d is None:
+                continue
+            holidays.append((d, rule.name))
+            if rule.observance is not None:
+                observed.append((d, rule))
+        # Substitute days skip every weekday that is a holiday in its own
+        # right, so those are placed first
+        taken = set(d for d, name in holidays if d.weekday() < SAT)
+        for d, rule in observed:
+            observed_date = rule.observance(d, taken)
+            if observed_date != d:
+                holidays.append((observed_date,
+                                 self.observed_format % rule.name))
+                taken.add(observed_date)
+        return holidays
+
+    def get_holiday_index(self, year):
+        """Returns a dict mapping each holiday date in the year to the names
+        of the holidays falling on it, in rule order."""
+        index = self._index_cache.get(year)
+        if index is None:
+            index = dict()
+            # Observed days can cross into the neighbouring years, where
+            # there are any
+            for y in range(max(year - 1, MINYEAR), min(year + 1, MAXYEAR) + 1):
+                for d, name in self.compile_year(y):
+                    if d.year == year:
+                        index.setdefault(d, []).append(name)
+            self._index_cache[year] = index
+        return index
+
+    def get_holiday_names(self):
+        """Returns the name of every holiday the rule set can produce."""
+        names = []
+        for rule in self.rules:
+            names.append(rule.name)
+            if rule.observance is not None:
+                names.append(self.observed_format % rule.name)
+        return names
+
+    def get_holidays(self, d):
+        return list(self.get_holiday_index(d.year).get(d, ()))
+
+    def is_holiday(self, d):
+        names = self.get_holidays(d)
+        if names:
+            return True, names[0]
+        return False, NO_HOLIDAY
+
+
+# U.S. federal holidays (5 U.S.C. 6103), including the moves made by the
+# Uniform Monday Holiday Act from 1971
+US_FEDERAL = HolidayRuleSet('us_federal', [
+    FixedDate("New Year's Day", JAN, 1, observance=nearest_weekday),
+    NthWeekday("Birthday of Martin Luther King, Jr.", 3, MON, JAN,
+               first_year=1986),
+    FixedDate("Washington's Birthday", FEB, 22, observance=nearest_weekday,
+              last_year=1970),
+    NthWeekday("Washington's Birthday", 3, MON, FEB, first_year=1971),
+    FixedDate("Memorial Day", MAY, 30, observance=nearest_weekday,
+              last_year=1970),
+    LastWeekday("Memorial Day", MON, MAY, first_year=1971),
+    FixedDate("Juneteenth National Independence Day", JUN, 19,
+              observance=nearest_weekday, first_year=2021),
+    FixedDate("Independence Day", JUL, 4, observance=nearest_weekday),
+    NthWeekday("Labor Day", 1, MON, SEP, first_year=1894),
+    FixedDate("Columbus Day", OCT, 12, observance=nearest_weekday,
+              first_year=1937, last_year=1970),
+    NthWeekday("Columbus Day", 2, MON, OCT, first_year=1971),
+    FixedDate("Veterans Day", NOV, 11, observance=nearest_weekday,
+              first_year=1938, last_year=1970),
+    NthWeekday("Veterans Day", 4, MON, OCT, first_year=1971, last_year=1977),
+    FixedDate("Veterans Day", NOV, 11, observance=nearest_weekday,
+              first_year=1978),
+    NthWeekday("Thanksgiving Day", 4, THU, NOV),
+    FixedDate("Christmas Day", DEC, 25, observance=nearest_weekday),
+])
+
+# New York Stock Exchange full-day closures; one-off closures are not rules
+NYSE = HolidayRuleSet('nyse', [
+    # The exchange does not close the Friday before a Saturday New Year
+    FixedDate("New Year's Day", JAN, 1, observance=sunday_to_monday),
+    NthWeekday("Birthday of Martin Luther King, Jr.", 3, MON, JAN,
+               first_year=1998),
+    NthWeekday("Washington's Birthday", 3, MON, FEB, first_year=1971),
+    EasterRelative("Good Friday", -2),
+    LastWeekday("Memorial Day", MON, MAY, first_year=1971),
+    FixedDate("Juneteenth National Independence Day", JUN, 19,
+              observance=nearest_weekday, first_year=2022),
+    FixedDate("Independence Day", JUL, 4, observance=nearest_weekday),
+    NthWeekday("Labor Day", 1, MON, SEP),
+    NthWeekday("Thanksgiving Day", 4, THU, NOV),
+    FixedDate("Christmas Day", DEC, 25, observance=nearest_weekday),
+])
+
+# Bank holidays in England and Wales under the Banking and Financial
+# Dealings Act 1971; one-off bank holidays are not rules
+UK_BANK = HolidayRuleSet('uk_bank', [
+    FixedDate("New Year's Day", JAN, 1, observance=next_free_weekday,
+              first_year=1974),
+    EasterRelative("Good Friday", -2),
+    EasterRelative("Easter Monday", 1),
+    NthWeekday("Early May Bank Holiday", 1, MON, MAY, first_year=1978),
+    LastWeekday("Spring Bank Holiday", MON, MAY, first_year=1971),
+    LastWeekday("Summer Bank Holiday", MON, AUG, first_year=1971),
+    FixedDate("Christmas Day", DEC, 25, observance=next_free_weekday),
+    FixedDate("Boxing Day", DEC, 26, observance=next_free_weekday),
+], observed_format='%s (Substitute Day)')
+
+# Holidays observed in Jewish communities, relative to the Hebrew calendar
+JEWISH = HolidayRuleSet('jewish', [
+    HebrewRelative("Rosh Hashanah Eve", TISHRI, 1, -1),
+    HebrewRelative("Rosh Hashanah", TISHRI, 1),
+    HebrewRelative("Yom Kippur Eve", TISHRI, 10, -1),
+    HebrewRelative("Yom Kippur", TISHRI, 10),
+    HebrewRelative("Hanukkah Eve", KISLEV, 25, -1),
+    HebrewRelative("Hanukkah", KISLEV, 25),
+    HebrewRelative("Passover Eve", NISAN, 15, -1),
+    HebrewRelative("Passover", NISAN, 15),
+])
+
+RULE_SETS = dict((rule_set.name, rule_set)
+                 for rule_set in (US_FEDERAL, NYSE, UK_BANK, JEWISH))
+
+
+def get_rule_set(rule_set):
+    """Returns the HolidayRuleSet named, or rule_set itself if it is not a
+    name. None selects every rule of the Holidays class."""
+    if rule_set is None or isinstance(rule_set, HolidayRuleSet):
+        return rule_set
+    try:
+        return RULE_SETS[rule_set]
+    except KeyError:
+        raise ValueError("Unknown holiday rule set: %s" % rule_set)
+
+
+def get_holiday_index(year, rule_set=None):
+    """Returns the {date: [holiday names]} index of the year under the rule
+    set, or under the Holidays rules when it is None."""
+    rule_set = get_rule_set(rule_set)
+    if rule_set is None:
+        return Holidays(year).get_holiday_index()
+    return rule_set.get_holiday_index(year)
+
+
+def get_holiday_names(rule_set=None):
+    """Returns the name of every holiday the rule set can produce."""
+    rule_set = get_rule_set(rule_set)
+    if rule_set is None:
+        return Holidays().get_holiday_names()
+    return rule_set.get_holiday_names()
+
+
+def get_holidays(d, rule_set=None):
+    """Returns the names of every holiday on d under the rule set."""
+    return list(get_holiday_index(d.year, rule_set).get(d, ()))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Precomputed holiday tables: every holiday of a span of years evaluated
+once, stored as sorted (ordinal, holiday id) arrays and a holiday name list,
+and saved as JSON or as an importable Python module."""
+
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from holidays import Holidays, NO_HOLIDAY
+
+
+DEFAULT_FIRST_YEAR = 1900
+DEFAULT_LAST_YEAR = 2200
+
+
+class HolidayTable(object):
+    """The holidays falling in first_year through last_year. ordinals holds
+    the proleptic Gregorian ordinal of each holiday in ascending order, and
+    ids the index into names of the holiday on that day; holidays sharing a
+    day keep their holiday_* method order."""
+
+    def __init__(self, first_year, last_year, names, ordinals, ids):
+        if len(ordinals) != len(ids):
+            raise ValueError("ordinals and ids differ in length")
+        self.first_year = first_year
+        self.last_year = last_year
+        # json reads names back as unicode; the writers format str
+        self.names = tuple(name.encode('utf-8') if isinstance(name, unicode)
+                           else name for name in names)
+        self.ordinals = array('i', ordinals)
+        self.ids = array('H', ids)
+        self.first_ordinal = date(first_year, 1, 1).toordinal()
+        self.last_ordinal = date(last_year, 12, 31).toordinal()
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def covers(self, year):
+        return self.first_year <= year <= self.last_year
+
+    def get_holiday_names(self, d):
+        """Returns the names of every holiday on d, found by binary search."""
+        ordinal = d.toordinal()
+        lo = bisect_left(self.ordinals, ordinal)
+        hi = bisect_right(self.ordinals, ordinal, lo)
+        return [self.names[i] for i in self.ids[lo:hi]]
+
+    def get_holiday_index(self, year):
+        """Returns the {date: [holiday names]} index of the year, as
+        Holidays.get_holiday_index does."""
+        lo = bisect_left(self.ordinals, date(year, 1, 1).toordinal())
+        hi = bisect_right(self.ordinals, date(year, 12, 31).toordinal(), lo)
+        index = dict()
+        for ordinal, i in zip(self.ordinals[lo:hi], self.ids[lo:hi]):
+            index.setdefault(date.fromordinal(ordinal), []).append(
+                self.names[i])
+        return index
+
+    def is_holiday(self, d):
+        names = self.get_holiday_names(d)
+        if names:
+            return True, names[0]
+        return False, NO_HOLIDAY
+
+    ## Serialization ##
+
+    def to_dict(self):
+        return {
+            'first_year': self.first_year,
+            'last_year': self.last_year,
+            'names': list(self.names),
+            'ordinals': self.ordinals.tolist(),
+            'ids': self.ids.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['first_year'], d['last_year'], d['names'],
+                   d['ordinals'], d['ids'])
+
+    def dump(self, f):
+        json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, f):
+        return cls.from_dict(json.load(f))
+
+    def write_module(self, f):
+        """Writes Python source defining TABLE, a HolidayTable equal to this
+        one, so that the table can be imported instead of loaded."""
+        f.write('# Generated by calendars.holiday_table; do not edit\n\n')
+        f.write('from calendars.holiday_table import HolidayTable\n\n')
+        f.write('NAMES = (\n')
+        for name in self.names:
+            f.write('    %r,\n' % name)
+        f.write(')\n\n')
+        for attr in ('ordinals', 'ids'):
+            values = getattr(self, attr).tolist()
+            f.write('%s = [\n' % attr.upper())
+            for i in range(0, len(values), 10):
+                f.write('    %s,\n' % ', '.join(str(v) for v in values[i:i+10]))
+            f.write(']\n\n')
+        f.write('TABLE = HolidayTable(%d, %d, NAMES, ORDINALS, IDS)\n' %
+                (self.first_year, self.last_year))
+
+
+def build_holiday_table(first_year=DEFAULT_FIRST_YEAR,
+                        last_year=DEFAULT_LAST_YEAR, holidays_class=Holidays):
+    """Evaluates every holiday rule of holidays_class for each year of the
+    span and returns the resulting HolidayTable."""
+    h = holidays_class(first_year)
+    methods = sorted(k for k in dir(h) if k.startswith('holiday_'))
+    names = h.get_holiday_names()
+    pairs = []
+    for year in range(first_year, last_year + 1):
+        h = holidays_class(year)
+        for i, method in enumerate(methods):
+            holiday_date = getattr(h, method)()[0]
+            # Rules may produce a neighbouring year's date (Hanukkah Eve on
+            # 31 Dec); Holidays only ever looks such a day up in its own year
+            if holiday_date and holiday_date.year == year:
+                pairs.append((holiday_date.toordinal(), i))
+    pairs.sort()
+    return HolidayTable(first_year, last_year, names,
+                        [ordinal for ordinal, i in pairs],
+                        [i for ordinal, i in pairs])
+
+
+def load_holiday_table(path):
+    with open(path) as f:
+        return HolidayTable.load(f)
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Precompute a holiday table")
+    parser.add_argument('first_year', type=int, nargs='?',
+                        default=DEFAULT_FIRST_YEAR)
+    parser.add_argument('last_year', type=int, nargs='?',
+                        default=DEFAULT_LAST_YEAR)
+    parser.add_argument('--module', action='store_true',
+                        help='write an importable Python module, not JSON')
+    parser.add_argument('--output', metavar='FILE',
+                        help='write the table to FILE (default: stdout)')
+    args = parser.parse_args()
+
+    table = build_holiday_table(args.first_year, args.last_year)
+    f = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.module:
+            table.write_module(f)
+        else:
+            table.dump(f)
+    finally:
+        if f is not sys.stdout:
+            f.close()
@@ -68,8 +68,19 @@ HEBREW_YEAR_OFFSET = 3760
 # U.S. presidential elections occur quadrennially, beginning with year 1792
 IS_PRESIDENTIAL_ELECTION_YEAR = lambda yyyy: yyyy > 1791 and yyyy % 4 == 0
 
+NO_HOLIDAY = "No Holiday"
+# Joins the names of the holidays sharing a day into a single column value
+HOLIDAY_NAME_SEPARATOR = '; '
+
 
 class Holidays(object):
+    # {(class, year): {date: [holiday names]}}, shared by every instance so
+    # that a year's holiday rules are only ever evaluated once
+    _index_cache = dict()
+    # {class: HolidayTable}, precomputed holidays used in place of the rules
+    # for the years they cover
+    _tables = dict()
+
     def __init__(self, year=None):
         if year:
             self.year = year
@@ -455,14 +466,63 @@ class Holidays(object):
         return (self.holiday_passover(year)[0] - timedelta(days=1),
                 "Passover Eve")
 
+    @classmethod
+    def set_holiday_table(cls, table):
+        """Looks up the holidays of the years a precomputed HolidayTable
+        covers in the table rather than evaluating this class's rules; pass
+        None to go back to evaluating them."""
+        if table is None:
+            cls._tables.pop(cls, None)
+        else:
+            cls._tables[cls] = table
+        for key in [k for k in cls._index_cache if k[0] is cls]:
+            del cls._index_cache[key]
+
+    def get_holiday_index(self, year=None):
+        """Returns a dict mapping each holiday date in the year to the names
+        of the holidays falling on it, in holiday_* method order."""
+        if not year:
+            year = self.year
+        key = (self.__class__, year)
+        index = self._index_cache.get(key)
+        if index is None:
+            table = self._tables.get(self.__class__)
+            if table is not None and table.covers(year):
+                index = table.get_holiday_index(year)
+            else:
+                index = self._build_holiday_index(year)
+            self._index_cache[key] = index
+        return index
+
+    def _build_holiday_index(self, year):
+        h = self if year == getattr(self, 'year', None) else self.__class__(year)
+        index = dict()
+        for holiday_fn in [k for k in dir(h) if k.startswith('holiday_')]:
+            holiday_date, holiday_name = getattr(h, holiday_fn)()
+            if holiday_date:
+                index.setdefault(holiday_date, []).append(holiday_name)
+        return index
+
+    def get_holiday_names(self, year=None):
+        """Returns the names of every holiday, in holiday_* method order."""
+        if not year:
+            year = getattr(self, 'year', None) or date.today().year
+        h = self if year == getattr(self, 'year', None) else self.__class__(year)
+        return [getattr(h, k)()[1] for k in dir(h) if k.startswith('holiday_')]
+
+    def get_holidays(self, d=None):
+        """Returns the names of every holiday on d, in holiday_* method
+        order, or an empty list."""
+        if d:
+            return list(self.get_holiday_index().get(d, ()))
+        return []
+
     def is_holiday(self, d=None):
         if d:
-            for holiday_fn in [k for k in dir(self)
-                               if k.startswith('holiday_')]:
-                holiday_date, holiday_name = getattr(self, holiday_fn)()
-                if holiday_date == d:
-                    return True, holiday_name
-        return False, "No Holiday"
+            holiday_names = self.get_holiday_index().get(d)
+            if holiday_names:
+                return True, holiday_names[0]
+        return False, NO_HOLIDAY
 
     def get_holiday_name(self, d=None):
         return self.is_holiday(d)[1]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+
+# Enough for every year of a multi-century dimension, and every month of the
+# most recent few of them
+YEAR_CACHE_SIZE = 512
+MONTH_CACHE_SIZE = 2048
+
+# The Julian day at the start of date.fromordinal(0)
+ORDINAL_EPOCH_JD = 1721424.5
+
+# date(1970, 1, 1).toordinal(), the origin of numpy's datetime64 and Arrow's
+# date32
+UNIX_EPOCH_ORDINAL = 719163
+
+
+def lru_cache(maxsize):
+    """Memoizes a function of hashable positional arguments, evicting the
+    least recently used result once maxsize results are cached. The cache
+    may be shared by threads; fn itself runs outside the lock."""
+    def decorator(fn):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args):
+            with lock:
+                try:
+                    result = cache.pop(args)
+                    cache[args] = result
+                    return result
+                except KeyError:
+                    pass
+            result = fn(*args)
+            with lock:
+                if args not in cache and len(cache) >= maxsize:
+                    cache.popitem(last=False)
+                cache[args] = result
+            return result
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+def make_date_key(d):
+    return d.year*10000 + d.month*100 + d.day
+
+
+class PeriodContext(object):
+    """The first and last days of a half, quarter or month, and the column
+    values derived from them."""
+
+    def __init__(self, number, first_day, last_day, label=None):
+        self.number = number
+        self.label = label
+        self.first_day = first_day
+        self.last_day = last_day
+        self.first_ordinal = first_day.toordinal()
+        self.last_ordinal = last_day.toordinal()
+        self.duration_in_days = self.last_ordinal - self.first_ordinal + 1
+        self.begin_date = first_day.isoformat()
+        self.begin_date_key = make_date_key(first_day)
+        self.end_date = last_day.isoformat()
+        self.end_date_key = make_date_key(last_day)
+
+
+class YearContext(object):
+    """Everything about a year that does not depend on the day."""
+
+    def __init__(self, year):
+        self.year = year
+        self.is_leap_year = calendar.isleap(year)
+        self.days_in_year = 366 if self.is_leap_year else 365
+        self.first_day = date(year, 1, 1)
+        self.last_day = date(year, 12, 31)
+        self.first_ordinal = self.first_day.toordinal()
+        self.last_ordinal = self.last_day.toordinal()
+        self.halves = tuple(
+            PeriodContext(h, date(year, h*6-5, 1),
+                          date(year, h*6, calendar.monthrange(year, h*6)[1]),
+                          'S%d%d' % (h, year))
+            for h in range(1, 3))
+        self.quarters = tuple(
+            PeriodContext(q, date(year, q*3-2, 1),
+                          date(year, q*3, calendar.monthrange(year, q*3)[1]),
+                          'Q%d%d' % (q, year))
+            for q in range(1, 5))
+
+
+class MonthContext(PeriodContext):
+    """Everything about a month that does not depend on the day."""
+
+    def __init__(self, year, month):
+        self.year = year
+        self.first_weekday, days_in_month = calendar.monthrange(year, month)
+        super(MonthContext, self).__init__(month, date(year, month, 1),
+                                           date(year, month, days_in_month))
+        self.year_month_key = year*100 + month
+        self.half_number_in_year = (month - 1) // 6 + 1
+        self.quarter_number_in_year = (month - 1) // 3 + 1
+        self.month_number_in_half = (month - 1) % 6 + 1
+        self.month_number_in_quarter = (month - 1) % 3 + 1
+
+
+@lru_cache(YEAR_CACHE_SIZE)
+def get_year_context(year):
+    return YearContext(year)
+
+
+@lru_cache(MONTH_CACHE_SIZE)
+def get_month_context(year, month):
+    return MonthContext(year, month)
@@ -16,9 +16,17 @@
 
 import sys
 import time
-from datetime import date, timedelta
+from datetime import date
 import calendar
-from calendars.holidays import Holidays
+from collections import namedtuple
+from calendars.holidays import NO_HOLIDAY, HOLIDAY_NAME_SEPARATOR
+from calendars.holiday_rules import get_holidays
+from calendars.business_days import get_business_calendar, DEFAULT_RULE_SET
+from date_context import get_year_context, get_month_context, make_date_key
+from fiscal_calendar import DEFAULT_FISCAL_CALENDAR
+from seasons import DEFAULT_SEASON_CALENDAR
+from alternate_calendars import (HIJRI, HEBREW, PERSIAN, INDIAN_CIVIL,
+                                 get_alternate_calendar)
 
 
 MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
@@ -31,6 +39,29 @@ DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
              'Saturday', 'Sunday']
 DAY_ABBREVIATIONS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
+# Every row shares these string objects rather than holding its own copies
+YES = intern('yes')
+NO = intern('no')
+WEEK_LABELS = [intern('W%02d' % w) for w in range(54)]
+
+# Week starts. SUNDAY and MONDAY weeks begin on that day, while their week
+# numbers count seven-day blocks from the first of the year; ISO weeks begin
+# on Monday and are numbered as ISO 8601 weeks are
+SUNDAY = 'sunday'
+MONDAY = 'monday'
+ISO = 'iso'
+# The ISO weekday (Monday is 1) each kind of week begins on
+WEEK_START_WEEKDAYS = {SUNDAY: 7, MONDAY: 1, ISO: 1}
+
+
+def get_week_start_weekday(week_start):
+    """Returns the ISO weekday the week_start (SUNDAY, MONDAY or ISO) weeks
+    begin on."""
+    try:
+        return WEEK_START_WEEKDAYS[week_start]
+    except KeyError:
+        raise ValueError("Unknown week start: %s" % week_start)
+
 
 class SqlQuery(object):
     def __init__(self):
@@ -43,12 +74,59 @@ class SqlQuery(object):
         return
 
 
+_row_types = dict()
+
+
+def get_row_type(column_names):
+    """Returns the compact row type, a namedtuple, for the column names
+    given. Row types are cached, so rows of one schema share a class."""
+    column_names = tuple(column_names)
+    row_type = _row_types.get(column_names)
+    if row_type is None:
+        class DateDimensionRow(namedtuple('DateDimensionRow', column_names)):
+            __slots__ = ()
+
+            @property
+            def columns(self):
+                # The dict interface of DateDimension, built on demand
+                return dict(zip(self._fields, self))
+
+        row_type = _row_types[column_names] = DateDimensionRow
+    return row_type
+
+
+get_row_type.cache_clear = _row_types.clear
+
+
+class LazyColumns(dict):
+    """The columns of a lazy DateDimension. Looking up a column computes
+    its group the first time, and the values are kept; iterating only sees
+    the columns computed so far, and initialize_table computes the rest."""
+
+    def __init__(self, date_dim):
+        super(LazyColumns, self).__init__()
+        self.date_dim = date_dim
+
+    def __missing__(self, k):
+        method = self.date_dim.get_column_groups().get(k)
+        if method is None:
+            raise KeyError(k)
+        getattr(self.date_dim, method)()
+        return dict.__getitem__(self, k)
+
+    def get(self, k, default=None):
+        try:
+            return self[k]
+        except KeyError:
+            return default
+
+
 class DateDimension(object):
 
     ## Date Key Functions ##
 
-    def make_date_key(self, d):
-        return d.year*10000 + d.month*100 + d.day
+    # date_context computes the keys of the contexts' begin and end dates
+    make_date_key = staticmethod(make_date_key)
 
     def make_year_month_key(self, d):
         return d.year*100 + d.month
@@ -59,15 +137,10 @@ class DateDimension(object):
     ## Year Functions ##
 
     def get_week_number_in_year(self, d):
-        y = d.year
-        w = 0
-        while d.year >= y:
-            w += 1
-            d -= timedelta(days=7)
-        return w
+        return (d.toordinal() - get_year_context(d.year).first_ordinal) // 7 + 1
 
     def get_days_remaining_in_year(self, d):
-        return (date(d.year, 12, 31) - d).days
+        return get_year_context(d.year).last_ordinal - d.toordinal()
 
     ## Half Year Functions ##
 
@@ -81,36 +154,16 @@ class DateDimension(object):
         return self.get_half_months(h,d).index(d.month)
 
     def get_week_number_in_half(self, h, d):
-        y = d.year
-        m = 1 if h == 1 else 7
-        w = 0
-        while d.month >= m and d.year == y:
-            w += 1
-            d -= timedelta(days=7)
-        return w
-        """
-        week = 0
-        half_first_month = 1 if h == 1 else 7
-        start = date(d.year, half_first_month, self.get_first_weekday_of_month(THU, half_first_month)) - timedelta(days=3)
-        while start <= d:
-            week += 1
-            start += timedelta(days=7)
-        if start.month > d.month:
-            week -= 1 if start - d >= timedelta(days=4) else 0
-
-        return week
-        """
+        return (self.get_day_number_in_half(h, d) - 1) // 7 + 1
 
     def get_day_number_in_half(self, h, d):
-        half_months = self.get_half_months(h,d)
-        half_month_days = [calendar.monthrange(d.year, n)[1] for n in half_months]
-        return d.day + sum([half_month_days[i] for i in range(0, half_months.index(d.month))])
+        return d.toordinal() - get_year_context(d.year).halves[h-1].first_ordinal + 1
 
     def get_first_day_in_half(self, h, d):
-        return d - timedelta(self.get_day_number_in_half(h,d)-1)
+        return get_year_context(d.year).halves[h-1].first_day
 
     def get_last_day_in_half(self, h, d):
-        return date(d.year, h*6, calendar.monthrange(d.year, h*6)[1])
+        return get_year_context(d.year).halves[h-1].last_day
 
     ## Quarter Functions ##
 
@@ -124,57 +177,21 @@ class DateDimension(object):
         return self.get_quarter_months(q,d).index(d.month)
 
     def get_week_number_in_quarter(self, q, d):
-        y = d.year
-        m = q*3-2
-        w = 0
-        while d.month >= m and d.year == y:
-            w += 1
-            d -= timedelta(days=7)
-        return w
-        """
-        week = 0
-        qtr_first_month = q*3-2
-        start = date(d.year, qtr_first_month, self.get_first_weekday_of_month(THU, qtr_first_month)) - timedelta(days=3)
-        while start <= d:
-            week += 1
-            start += timedelta(days=7)
-        if start.month > d.month:
-            week -= 1 if start - d >= timedelta(days=4) else 0
-
-        return week
-        """
+        return (self.get_day_number_in_quarter(q, d) - 1) // 7 + 1
 
     def get_day_number_in_quarter(self, q, d):
-        qtr_months = self.get_quarter_months(q,d)
-        qtr_month_days = [calendar.monthrange(d.year, n)[1] for n in qtr_months]
-        return d.day + sum([qtr_month_days[i] for i in range(0, qtr_months.index(d.month))])
+        return d.toordinal() - get_year_context(d.year).quarters[q-1].first_ordinal + 1
 
     def get_first_day_in_quarter(self, q, d):
-        return d - timedelta(self.get_day_number_in_quarter(q,d)-1)
+        return get_year_context(d.year).quarters[q-1].first_day
 
     def get_last_day_in_quarter(self, q, d):
-        return date(d.year, q*3, calendar.monthrange(d.year, q*3)[1])
+        return get_year_context(d.year).quarters[q-1].last_day
 
     ## Month Functions ##
 
     def get_week_number_in_month(self, d):
-        m = d.month
-        w = 0
-        while d.month == m:
-            w += 1
-            d -= timedelta(days=7)
-        return w
-        """
-        week = 0
-        start = date(d.year, d.month, self.get_first_weekday_of_month(THU, d.month)) - timedelta(days=3)
-        while start <= d:
-            week += 1
-            start += timedelta(days=7)
-        if start.month > d.month:
-            week -= 1 if start - d >= timedelta(days=4) else 0
-
-        return week
-        """
+        return (d.day - 1) // 7 + 1
 
     def get_nth_weekday_of_month(self, n, weekday, month, d):
         (first_weekday, days_in_month) = calendar.monthrange(d.year, month)
@@ -200,186 +217,326 @@ class DateDimension(object):
     ## Misc. Functions ##
 
     def get_season(self, d):
-        if d < date(d.year, 3, 20) or d >= date(d.year, 12, 21):
-            return "Winter"
-        elif d < date(d.year, 6, 20):
-            return "Spring"
-        elif d < date(d.year, 9, 22):
-            return "Summer"
-        elif d < date(d.year, 12, 21):
-            return "Fall"
+        return self.season_calendar.get_season(d)
 
     ## Fiscal Year Conversions ##
 
-    def convert_calendar_date_to_fiscal_date(self, d, o):
-        if not o:
-            o = self.fiscal_offset
-        return date(d.year + o.year, d.month + o.month, d.day + o.day)
+    def convert_calendar_date_to_fiscal_date(self, d, fiscal_calendar=None):
+        """Returns d as a FiscalDate (fiscal year, period, day in period)."""
+        return (fiscal_calendar or self.fiscal_calendar).to_fiscal_date(d)
 
-    def convert_fiscal_date_to_calendar_date(self, fd, d):
-        delta = self.fy_begin - fd
-        return
-        #dy = self.fy_begin.year - fd.year
-        #dm = self.fy_begin.month - fd.month
-        #dd = self.fy_begin.day - fd.day
-        #return date(d.year + dy, d.month + dm, d.day + dd)
-        #return d + (self.fy_begin - fd)
+    def convert_fiscal_date_to_calendar_date(self, fd, fiscal_calendar=None):
+        """Returns the calendar date of a FiscalDate."""
+        return (fiscal_calendar or self.fiscal_calendar).from_fiscal_date(fd)
 
     ## Initialization ##
 
-    # d is the current calendar date
-    # fd is the equivalent fiscal calendar date -- it's assumd a priori that
-    # the conversion has already taken place. All fiscal begin/end dates and
-    # date keys, however, correspond to the calendar date.
+    # Each initialize_*_columns method computes one group of columns, and
+    # neither reads the others' columns nor depends on them having run, so
+    # any subset of the groups can be computed
+    COLUMN_GROUPS = (
+        'initialize_date_columns',
+        'initialize_year_columns',
+        'initialize_half_columns',
+        'initialize_quarter_columns',
+        'initialize_month_columns',
+        'initialize_day_columns',
+        'initialize_week_columns',
+        'initialize_weekday_columns',
+        'initialize_workday_columns',
+        'initialize_last_day_columns',
+        'initialize_holiday_columns',
+        'initialize_season_columns',
+        'initialize_one_year_ago_columns',
+        'initialize_fiscal_columns',
+    )
+
+    # Groups computed only for the alternate calendars asked for, or for
+    # their columns when they are projected or looked up
+    ALTERNATE_CALENDAR_GROUPS = {
+        HIJRI: 'initialize_hijri_columns',
+        HEBREW: 'initialize_hebrew_columns',
+        PERSIAN: 'initialize_persian_columns',
+        INDIAN_CIVIL: 'initialize_indian_civil_columns',
+    }
+
+    # {column name: COLUMN_GROUPS method}, found on first use
+    _column_groups = None
+    # {tuple of column names: COLUMN_GROUPS methods computing them}
+    _projections = dict()
+
+    @classmethod
+    def get_column_groups(cls):
+        """Returns {column name: name of the method computing it}."""
+        if cls._column_groups is None:
+            sample = cls(date(2000, 1, 1), lazy=True)
+            groups = dict()
+            for method in cls.get_all_column_groups():
+                before = set(sample.columns)
+                getattr(sample, method)()
+                for k in set(sample.columns) - before:
+                    groups[k] = method
+            cls._column_groups = groups
+        return cls._column_groups
+
+    @classmethod
+    def get_projection(cls, columns):
+        """Returns the COLUMN_GROUPS methods needed to compute columns, in
+        order; raises ValueError if any of them is not a column."""
+        columns = tuple(columns)
+        methods = cls._projections.get(columns)
+        if methods is None:
+            groups = cls.get_column_groups()
+            unknown = [k for k in columns if k not in groups]
+            if unknown:
+                raise ValueError("Unknown columns: %s" % ', '.join(unknown))
+            needed = set(groups[k] for k in columns)
+            methods = cls._projections[columns] = tuple(
+                method for method in cls.get_all_column_groups()
+                if method in needed)
+        return methods
+
+    @classmethod
+    def cache_clear(cls):
+        """Forgets the column groups and projections found so far."""
+        cls._column_groups = None
+        cls._projections.clear()
+
+    @classmethod
+    def get_all_column_groups(cls):
+        """Returns COLUMN_GROUPS and then the alternate calendar groups."""
+        return cls.COLUMN_GROUPS + tuple(
+            sorted(cls.ALTERNATE_CALENDAR_GROUPS.values()))
+
+    def get_contexts(self):
+        """Returns the year, half, quarter and month contexts of the date,
+        looked up once and shared by the column groups."""
+        if self._contexts is None:
+            d = self.date
+            year = get_year_context(d.year)
+            month = get_month_context(d.year, d.month)
+            self._contexts = (year,
+                              year.halves[month.half_number_in_year-1],
+                              year.quarters[month.quarter_number_in_year-1],
+                              month)
+        return self._contexts
+
+    # d is the current calendar date. All fiscal begin/end dates and date
+    # keys correspond to calendar dates.
     def initialize_table(self):
+        for method in self.COLUMN_GROUPS:
+            getattr(self, method)()
+        for name in self.alternate_calendars:
+            getattr(self, self.ALTERNATE_CALENDAR_GROUPS[name])()
+
+    def initialize_columns(self, columns):
+        """Computes only the groups the columns named belong to, and keeps
+        only those columns."""
+        for method in self.get_projection(columns):
+            getattr(self, method)()
+        # Names may repeat, so compare against the distinct names
+        if len(self.columns) > len(set(columns)):
+            self.columns = dict((k, self.columns[k]) for k in columns)
+
+    def initialize_date_columns(self):
         d = self.date
-        #fd = self.fiscal_date
-        h = Holidays(d.year)
-
         self.columns['date_key'] = self.make_date_key(d)
         self.columns['full_date'] = d.isoformat()
 
-
+    def initialize_year_columns(self):
+        d = self.date
+        year, half, quarter, month = self.get_contexts()
         self.columns['year_key'] = self.make_year_key(d)
-        self.columns['year_month_key'] = self.make_year_month_key(d)
+        self.columns['year_month_key'] = month.year_month_key
         self.columns['iso8601_year'] = d.isocalendar()[0]
-        self.columns['is_leap_year'] = ('yes' if calendar.isleap(d.year)
-                                        else 'no')
-
-
-        self.columns['half_number_in_year'] = self.get_half_from_date(d)
-        self.columns['half_duration_in_days'] = (
-            self.get_last_day_in_half(self.columns['half_number_in_year'],
-                                      d).toordinal() -
-            self.get_first_day_in_half(self.columns['half_number_in_year'],
-                                       d).toordinal() + 1)
-        self.columns['half_label'] = 'S%d%d' % (
-            self.columns['half_number_in_year'],
-            d.year)
-        self.columns['half_begin_date'] = self.get_first_day_in_half(
-            self.columns['half_number_in_year'], d).isoformat()
-        self.columns['half_begin_date_key'] = self.make_date_key(
-            self.get_first_day_in_half(self.columns['half_number_in_year'], d))
-        self.columns['half_end_date'] = self.get_last_day_in_half(
-            self.columns['half_number_in_year'], d).isoformat()
-        self.columns['half_end_date_key'] = self.make_date_key(
-            self.get_last_day_in_half(self.columns['half_number_in_year'], d))
-
-
-        self.columns['quarter_number_in_year'] = self.get_quarter_from_date(d)
-        self.columns['quarter_number_in_half'] = (
-            self.columns['quarter_number_in_year'] - 1) % 2 + 1
-        self.columns['quarter_duration_in_days'] = (
-            self.get_last_day_in_quarter(
-                self.columns['quarter_number_in_year'], d).toordinal() -
-            self.get_first_day_in_quarter(self.columns['quarter_number_in_year'],
-                                          d).toordinal() + 1)
-        self.columns['quarter_label'] = 'Q%d%d' % (
-            self.columns['quarter_number_in_year'],
-            d.year)
-        self.columns['quarter_begin_date'] = self.get_first_day_in_quarter(
-            self.columns['quarter_number_in_year'], d).isoformat()
-        self.columns['quarter_begin_date_key'] = self.make_date_key(
-            self.get_first_day_in_quarter(
-                self.columns['quarter_number_in_year'], d))
-        self.columns['quarter_end_date'] = self.get_last_day_in_quarter(
-            self.columns['quarter_number_in_year'], d).isoformat()
-        self.columns['quarter_end_date_key'] = self.make_date_key(
-            self.get_last_day_in_quarter(
-                self.columns['quarter_number_in_year'], d))
-
-
-        self.columns['month_number_in_year'] = d.month
-        self.columns['month_number_in_half'] = (
-            self.columns['month_number_in_year'] - 1) % 6 + 1
-        self.columns['month_number_in_quarter'] = (
-            self.columns['month_number_in_half'] - 1) % 3 + 1
-        self.columns['month_duration_in_days'] = calendar.monthrange(
-            d.year, d.month)[1]
+        self.columns['is_leap_year'] = YES if year.is_leap_year else NO
+
+    def initialize_half_columns(self):
+        year, half, quarter, month = self.get_contexts()
+        self.columns['half_number_in_year'] = half.number
+        self.columns['half_duration_in_days'] = half.duration_in_days
+        self.columns['half_label'] = half.label
+        self.columns['half_begin_date'] = half.begin_date
+        self.columns['half_begin_date_key'] = half.begin_date_key
+        self.columns['half_end_date'] = half.end_date
+        self.columns['half_end_date_key'] = half.end_date_key
+
+    def initialize_quarter_columns(self):
+        year, half, quarter, month = self.get_contexts()
+        self.columns['quarter_number_in_year'] = quarter.number
+        self.columns['quarter_number_in_half'] = (quarter.number - 1) % 2 + 1
+        self.columns['quarter_duration_in_days'] = quarter.duration_in_days
+        self.columns['quarter_label'] = quarter.label
+        self.columns['quarter_begin_date'] = quarter.begin_date
+        self.columns['quarter_begin_date_key'] = quarter.begin_date_key
+        self.columns['quarter_end_date'] = quarter.end_date
+        self.columns['quarter_end_date_key'] = quarter.end_date_key
+
+    def initialize_month_columns(self):
+        d = self.date
+        year, half, quarter, month = self.get_contexts()
+        self.columns['month_number_in_year'] = month.number
+        self.columns['month_number_in_half'] = month.month_number_in_half
+        self.columns['month_number_in_quarter'] = month.month_number_in_quarter
+        self.columns['month_duration_in_days'] = month.duration_in_days
         self.columns['month_name'] = MONTH_NAMES[d.month-1]
         self.columns['month_abbreviation'] = MONTH_ABBREVIATIONS[d.month-1]
-        self.columns['month_begin_date'] = date(d.year, d.month, 1).isoformat()
-        self.columns['month_begin_date_key'] = self.make_date_key(
-            date(d.year, d.month, 1))
-        self.columns['month_end_date'] = date(
-            d.year, d.month, self.columns['month_duration_in_days']).isoformat()
-        self.columns['month_end_date_key'] = self.make_date_key(
-            date(d.year, d.month, self.columns['month_duration_in_days']))
-
-
-        self.columns['week_number_in_year'] = self.get_week_number_in_year(d)
-        self.columns['iso8601_week_number_in_year'] = d.isocalendar()[1]
-        self.columns['week_number_in_half'] = self.get_week_number_in_half(
-            self.columns['half_number_in_year'], d)
+        self.columns['month_begin_date'] = month.begin_date
+        self.columns['month_begin_date_key'] = month.begin_date_key
+        self.columns['month_end_date'] = month.end_date
+        self.columns['month_end_date_key'] = month.end_date_key
+
+    def initialize_day_columns(self):
+        ordinal = self.ordinal
+        year, half, quarter, month = self.get_contexts()
+        self.columns['day_number_in_year'] = ordinal - year.first_ordinal + 1
+        self.columns['day_number_in_half'] = ordinal - half.first_ordinal + 1
+        self.columns['day_number_in_quarter'] = (
+            ordinal - quarter.first_ordinal + 1)
+        self.columns['day_number_in_month'] = self.date.day
+
+    def initialize_week_columns(self):
+        d = self.date
+        ordinal = self.ordinal
+        year, half, quarter, month = self.get_contexts()
+        iso_year, iso_week, iso_weekday = d.isocalendar()
+        days_into_week = (iso_weekday - self.week_start_weekday) % 7
+        week_begin = date.fromordinal(ordinal - days_into_week)
+        week_end = date.fromordinal(ordinal - days_into_week + 6)
+        if self.week_start == ISO:
+            week_number_in_year = iso_week
+        else:
+            # Week 1 is the week containing January 1, so a week belongs to
+            # the year its last day is in. Ordinal 1 was a Monday, so
+            # (ordinal - weekday) % 7 is the days ordinal is into its week
+            week_year = (year if week_end.year == d.year
+                         else get_year_context(week_end.year))
+            first_week_begin = week_year.first_ordinal - (
+                week_year.first_ordinal - self.week_start_weekday) % 7
+            week_number_in_year = (
+                (week_begin.toordinal() - first_week_begin) // 7 + 1)
+        self.columns['week_number_in_year'] = week_number_in_year
+        self.columns['iso8601_week_number_in_year'] = iso_week
+        self.columns['week_number_in_half'] = (
+            (ordinal - half.first_ordinal) // 7 + 1)
         self.columns['week_number_in_quarter'] = (
-            self.get_week_number_in_quarter(
-                self.columns['quarter_number_in_year'], d))
+            (ordinal - quarter.first_ordinal) // 7 + 1)
         self.columns['week_number_in_month'] = self.get_week_number_in_month(d)
-        self.columns['week_label'] = (
-            'W%02d' % self.columns['week_number_in_year'])
-        self.columns['week_begin_date'] = (d - timedelta(
-            days=d.isoweekday())).isoformat()
-        self.columns['week_begin_date_key'] = self.make_date_key(
-            d - timedelta(days=d.isoweekday()))
-        self.columns['week_end_date'] = (d + timedelta(
-            days=6-(d.isoweekday()-1))).isoformat()
-        self.columns['week_end_date_key'] = self.make_date_key(
-            d + timedelta(days=6-(d.isoweekday()-1)))
-
-
-        # Calendar weeks start on Sunday
-        self.columns['day_number_in_year'] = (
-            d.toordinal() - date(d.year, 1, 1).toordinal() + 1)
-        self.columns['day_number_in_half'] = self.get_day_number_in_half(
-            self.columns['half_number_in_year'], d)
-        self.columns['day_number_in_quarter'] = self.get_day_number_in_quarter(
-            self.columns['quarter_number_in_year'], d)
-        self.columns['day_number_in_month'] = d.day
-        self.columns['day_number_in_week'] = d.isoweekday()+1
-        self.columns['iso8601_day_number_in_week'] = d.isocalendar()[2]
-        self.columns['day_name'] = DAY_NAMES[d.isoweekday()-1]
-        self.columns['day_abbreviation'] = DAY_ABBREVIATIONS[d.isoweekday()-1]
-        self.columns['is_weekday'] = ('yes'
-                                      if self.columns['day_number_in_week'] < 6
-                                      else 'no')
-        self.columns['is_weekend'] = ('yes'
-                                      if 4 < self.columns['day_number_in_week']
-                                      else 'no')
-        self.columns['is_workday'] = 'no'
+        self.columns['week_label'] = WEEK_LABELS[week_number_in_year]
+        # Seven rows share each week's begin and end dates
+        self.columns['week_begin_date'] = intern(week_begin.isoformat())
+        self.columns['week_begin_date_key'] = self.make_date_key(week_begin)
+        self.columns['week_end_date'] = intern(week_end.isoformat())
+        self.columns['week_end_date_key'] = self.make_date_key(week_end)
+
+    def initialize_weekday_columns(self):
+        iso_weekday = self.date.isoweekday()
+        day_number_in_week = (iso_weekday - self.week_start_weekday) % 7 + 1
+        self.columns['day_number_in_week'] = day_number_in_week
+        self.columns['iso8601_day_number_in_week'] = iso_weekday
+        self.columns['day_name'] = DAY_NAMES[iso_weekday-1]
+        self.columns['day_abbreviation'] = DAY_ABBREVIATIONS[iso_weekday-1]
+        self.columns['is_weekday'] = YES if iso_weekday < 6 else NO
+        self.columns['is_weekend'] = YES if iso_weekday > 5 else NO
+        # Workweeks end on Friday, whichever day weeks start on
         self.columns['is_last_day_in_workweek'] = (
-            'yes'
-            if self.columns['day_number_in_week'] == 5
-            else 'no')
+            YES if iso_weekday == 5 else NO)
         self.columns['is_last_day_in_week'] = (
-            'yes'
-            if self.columns['day_number_in_week'] == 7
-            else 'no')
+            YES if day_number_in_week == 7 else NO)
+
+    def initialize_workday_columns(self):
+        d = self.date
+        # Workdays are weekdays that are not holidays of the rule set, or of
+        # the U.S. federal ones when every Holidays rule is in use
+        workdays = get_business_calendar(
+            DEFAULT_RULE_SET if self.rule_set is None else self.rule_set)
+        self.columns['is_workday'] = YES if workdays.is_business_day(d) else NO
+        self.columns['workday_number_in_month'] = (
+            workdays.business_day_number_in_month(d))
+        self.columns['workday_number_in_year'] = (
+            workdays.business_day_number_in_year(d))
+
+    def initialize_last_day_columns(self):
+        ordinal = self.ordinal
+        year, half, quarter, month = self.get_contexts()
         self.columns['is_last_day_in_month'] = (
-            'yes'
-            if d.day == calendar.monthrange(d.year, d.month)[1]
-            else 'no')
+            YES if ordinal == month.last_ordinal else NO)
         self.columns['is_last_day_in_quarter'] = (
-            'yes'
-            if d == self.get_last_day_in_quarter(self.columns['quarter_number_in_year'], d)
-            else 'no')
+            YES if ordinal == quarter.last_ordinal else NO)
         self.columns['is_last_day_in_half'] = (
-            'yes'
-            if d == self.get_last_day_in_half(self.columns['half_number_in_year'], d)
-            else 'no')
-        self.columns['is_last_day_in_year'] = ('yes'
-                                               if d.month == 12 and d.day == 31
-                                               else 'no')
-        self.columns['is_holiday'] = ('yes'
-                                      if h.is_holiday(d)
-                                      else 'no')
-        self.columns['holiday_name'] = h.get_holiday_name(d)
-        self.columns['season_name'] = self.get_season(d)
-        self.columns['one_year_ago_date'] = (
-            d - timedelta(days=366
-                          if calendar.isleap(d.year)
-                          else 365)).isoformat()
+            YES if ordinal == half.last_ordinal else NO)
+        self.columns['is_last_day_in_year'] = (
+            YES if ordinal == year.last_ordinal else NO)
+
+    def initialize_holiday_columns(self):
+        # Every holiday on the day; holiday_name keeps the first of them
+        holiday_names = get_holidays(self.date, self.rule_set)
+        self.columns['is_holiday'] = YES if holiday_names else NO
+        self.columns['holiday_name'] = (
+            holiday_names[0] if holiday_names else NO_HOLIDAY)
+        self.columns['holiday_names'] = (
+            HOLIDAY_NAME_SEPARATOR.join(holiday_names) or NO_HOLIDAY)
+        self.columns['holiday_count'] = len(holiday_names)
+
+    def initialize_season_columns(self):
+        self.columns['season_name'] = self.get_season(self.date)
+
+    def initialize_one_year_ago_columns(self):
+        year = self.get_contexts()[0]
+        one_year_ago = date.fromordinal(self.ordinal - year.days_in_year)
+        self.columns['one_year_ago_date'] = one_year_ago.isoformat()
         self.columns['one_year_ago_date_key'] = self.make_date_key(
-            (d - timedelta(days=366 if calendar.isleap(d.year) else 365)))
+            one_year_ago)
+
+    def initialize_fiscal_columns(self):
+        ordinal = self.ordinal
+        # The fiscal year's periods, quarters and halves are precomputed
+        fiscal_year = self.fiscal_calendar.get_fiscal_year(self.date)
+        period = fiscal_year.get_period(ordinal)
+        quarter = fiscal_year.quarters[(period.number - 1) // 3]
+        self.columns.update(fiscal_year.get_period_columns(period))
+        self.columns['fiscal_week_number_in_year'] = (
+            (ordinal - fiscal_year.first_ordinal) // 7 + 1)
+        self.columns['fiscal_week_number_in_quarter'] = (
+            (ordinal - quarter.first_ordinal) // 7 + 1)
+        self.columns['fiscal_week_number_in_period'] = (
+            (ordinal - period.first_ordinal) // 7 + 1)
+        self.columns['fiscal_day_number_in_year'] = (
+            ordinal - fiscal_year.first_ordinal + 1)
+        self.columns['fiscal_day_number_in_quarter'] = (
+            ordinal - quarter.first_ordinal + 1)
+        self.columns['fiscal_day_number_in_period'] = (
+            ordinal - period.first_ordinal + 1)
+        self.columns['is_last_day_in_fiscal_period'] = (
+            YES if ordinal == period.last_ordinal else NO)
+        self.columns['is_last_day_in_fiscal_quarter'] = (
+            YES if ordinal == quarter.last_ordinal else NO)
+        self.columns['is_last_day_in_fiscal_year'] = (
+            YES if ordinal == fiscal_year.last_ordinal else NO)
+
+    def initialize_alternate_calendar_columns(self, name):
+        # The month's columns are shared by its days, and found in the
+        # calendar's table of the Gregorian year's months
+        calendar = get_alternate_calendar(name)
+        month, first_ordinal = calendar.get_month(self.ordinal,
+                                                  self.get_contexts()[0])
+        day = self.ordinal - first_ordinal + 1
+        self.columns.update(month)
+        self.columns[calendar.day_column] = day
+        self.columns[calendar.date_key_column] = (
+            month[calendar.year_month_key_column]*100 + day)
+
+    def initialize_hijri_columns(self):
+        self.initialize_alternate_calendar_columns(HIJRI)
+
+    def initialize_hebrew_columns(self):
+        self.initialize_alternate_calendar_columns(HEBREW)
+
+    def initialize_persian_columns(self):
+        self.initialize_alternate_calendar_columns(PERSIAN)
+
+    def initialize_indian_civil_columns(self):
+        self.initialize_alternate_calendar_columns(INDIAN_CIVIL)
 
     def generate_insert_statement(self):
         #insert = ("INSERT INTO date_dimension (%s) VALUES (%s)\n" %
@@ -394,9 +551,38 @@ class DateDimension(object):
                                else '%d' % self.columns[k], keys))))
 
 
-    def __init__(self, d):
-        # Week starts on Sunday
-        calendar.setfirstweekday(calendar.SUNDAY)
+    def to_row(self):
+        """Returns the columns as a compact, immutable DateDimensionRow."""
+        keys = sorted(self.columns.keys())
+        return get_row_type(keys)(*[self.columns[k] for k in keys])
+
+    def __init__(self, d, rule_set=None, fiscal_calendar=None, columns=None,
+                 lazy=False, week_start=SUNDAY, season_calendar=None,
+                 alternate_calendars=None):
         self.date = d
-        self.columns = dict()
-        self.initialize_table()
+        self.ordinal = d.toordinal()
+        # Holiday rule set (or its name) for the holiday columns; None uses
+        # every Holidays rule
+        self.rule_set = rule_set
+        self.fiscal_calendar = fiscal_calendar or DEFAULT_FISCAL_CALENDAR
+        self.season_calendar = season_calendar or DEFAULT_SEASON_CALENDAR
+        # Names of the alternate calendars (HIJRI, HEBREW, PERSIAN and
+        # INDIAN_CIVIL) whose columns a full row includes
+        self.alternate_calendars = tuple(alternate_calendars or ())
+        for name in self.alternate_calendars:
+            if name not in self.ALTERNATE_CALENDAR_GROUPS:
+                raise ValueError("Unknown calendar: %s" % name)
+        self.week_start = week_start
+        self.week_start_weekday = get_week_start_weekday(week_start)
+        self._contexts = None
+        # lazy defers every column until it is looked up; otherwise columns,
+        # a list of column names, limits the row to those columns and None
+        # computes all of them
+        if lazy:
+            self.columns = LazyColumns(self)
+        elif columns is not None:
+            self.columns = dict()
+            self.initialize_columns(columns)
+        else:
+            self.columns = dict()
+            self.initialize_table()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import date, timedelta
+from calendars.holidays import NO_HOLIDAY, HOLIDAY_NAME_SEPARATOR
+from calendars.holiday_rules import get_holiday_index
+from calendars.business_days import get_business_calendar, DEFAULT_RULE_SET
+from date_dimension import (MONTH_NAMES, MONTH_ABBREVIATIONS, DAY_NAMES,
+                            DAY_ABBREVIATIONS, SUNDAY, ISO,
+                            get_week_start_weekday)
+from generate_date_dimension import EPOCH_COUNTERS
+from date_context import ORDINAL_EPOCH_JD, UNIX_EPOCH_ORDINAL
+from fiscal_calendar import DEFAULT_FISCAL_CALENDAR
+from seasons import DEFAULT_SEASON_CALENDAR
+from alternate_calendars import (HIJRI, HEBREW, PERSIAN, INDIAN_CIVIL,
+                                 get_month_names)
+from calendars import calendar_util_array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Cumulative days before each month in a common year
+DAYS_BEFORE_MONTH = (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+## Array Helpers ##
+#
+# Dates are handled as proleptic Gregorian ordinals (date.toordinal()), which
+# keeps every column computation in plain integer arithmetic.
+
+def _is_leap(y):
+    return (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+
+
+def _ordinal_to_ymd(ordinals):
+    # Shift to a March-based year so that leap days fall at the end
+    z = ordinals + 305
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+    m = np.where(mp < 10, mp + 3, mp - 9)
+    y = yoe + era * 400 + (m <= 2)
+    return y, m, d
+
+
+def _ymd_to_ordinal(y, m, d):
+    y1 = y - 1
+    return (y1 * 365 + y1 // 4 - y1 // 100 + y1 // 400 +
+            np.array(DAYS_BEFORE_MONTH)[m] + ((m > 2) & _is_leap(y)) + d)
+
+
+def _date_key(ordinals):
+    y, m, d = _ordinal_to_ymd(ordinals)
+    return y*10000 + m*100 + d
+
+
+def _yes_no(flags):
+    return np.array(['no', 'yes'], dtype=object)[flags.astype(np.int8)]
+
+
+class _DateLookup(object):
+    # Formatting dates as text is by far the slowest part of a build, so
+    # every date column indexes tables of pre-formatted strings and keys
+    # covering the span being built
+    def __init__(self, first, last):
+        self.first = first
+        ordinals = np.arange(first, last + 1)
+        self.keys = _date_key(ordinals)
+        self.strings = (ordinals - UNIX_EPOCH_ORDINAL).astype(
+            'datetime64[D]').astype(str).astype(object)
+
+    def isoformat(self, ordinals):
+        return self.strings[ordinals - self.first]
+
+    def date_key(self, ordinals):
+        return self.keys[ordinals - self.first]
+
+
+def _period_labels(prefix, number, periods, y):
+    first_year = y.min()
+    labels = np.array(['%s%d%d' % (prefix, n, yyyy)
+                       for yyyy in range(first_year, y.max() + 1)
+                       for n in range(1, periods + 1)], dtype=object)
+    return labels[(y - first_year)*periods + number - 1]
+
+
+## Column Builder ##
+
+def _build_calendar_columns(ordinals, rule_set=None, week_start=SUNDAY):
+    columns = dict()
+    # Derived dates lie within a year of the dates being built
+    lookup = _DateLookup(ordinals[0] - 366, ordinals[-1] + 366)
+    _isoformat, _date_key = lookup.isoformat, lookup.date_key
+    y, m, dom = _ordinal_to_ymd(ordinals)
+    leap = _is_leap(y)
+    isoweekday = (ordinals - 1) % 7 + 1
+
+    year_begin = _ymd_to_ordinal(y, 1, 1)
+    month_begin = ordinals - dom + 1
+    month_days = _ymd_to_ordinal(y + m // 12, m % 12 + 1, 1) - month_begin
+
+    columns['date_key'] = y*10000 + m*100 + dom
+    columns['full_date'] = _isoformat(ordinals)
+
+    columns['year_key'] = y
+    columns['year_month_key'] = y*100 + m
+    columns['is_leap_year'] = _yes_no(leap)
+
+    # ISO 8601 weeks belong to the year containing their Thursday
+    thursday = ordinals - isoweekday + 4
+    iso_year = _ordinal_to_ymd(thursday)[0]
+    columns['iso8601_year'] = iso_year
+    columns['iso8601_week_number_in_year'] = (
+        thursday - _ymd_to_ordinal(iso_year, 1, 1)) // 7 + 1
+    columns['iso8601_day_number_in_week'] = isoweekday
+
+    for period, months_in_period, prefix in (('half', 6, 'S'),
+                                             ('quarter', 3, 'Q')):
+        number = (m - 1) // months_in_period + 1
+        begin = _ymd_to_ordinal(y, (number - 1) * months_in_period + 1, 1)
+        end_month = number * months_in_period
+        end = _ymd_to_ordinal(y + end_month // 12, end_month % 12 + 1, 1) - 1
+        day_number = ordinals - begin + 1
+
+        columns['%s_number_in_year' % period] = number
+        columns['%s_duration_in_days' % period] = end - begin + 1
+        columns['%s_label' % period] = _period_labels(
+            prefix, number, 12 // months_in_period, y)
+        columns['%s_begin_date' % period] = _isoformat(begin)
+        columns['%s_begin_date_key' % period] = _date_key(begin)
+        columns['%s_end_date' % period] = _isoformat(end)
+        columns['%s_end_date_key' % period] = _date_key(end)
+        columns['week_number_in_%s' % period] = (day_number - 1) // 7 + 1
+        columns['day_number_in_%s' % period] = day_number
+        columns['is_last_day_in_%s' % period] = _yes_no(ordinals == end)
+
+    columns['quarter_number_in_half'] = (
+        columns['quarter_number_in_year'] - 1) % 2 + 1
+
+    month_end = month_begin + month_days - 1
+    columns['month_number_in_year'] = m
+    columns['month_number_in_half'] = (m - 1) % 6 + 1
+    columns['month_number_in_quarter'] = (
+        columns['month_number_in_half'] - 1) % 3 + 1
+    columns['month_duration_in_days'] = month_days
+    columns['month_name'] = np.array(MONTH_NAMES, dtype=object)[m - 1]
+    columns['month_abbreviation'] = np.array(MONTH_ABBREVIATIONS,
+                                             dtype=object)[m - 1]
+    columns['month_begin_date'] = _isoformat(month_begin)
+    columns['month_begin_date_key'] = _date_key(month_begin)
+    columns['month_end_date'] = _isoformat(month_end)
+    columns['month_end_date_key'] = _date_key(month_end)
+
+    day_number_in_year = ordinals - year_begin + 1
+    week_start_weekday = get_week_start_weekday(week_start)
+    days_into_week = (isoweekday - week_start_weekday) % 7
+    week_begin = ordinals - days_into_week
+    week_end = week_begin + 6
+    if week_start == ISO:
+        columns['week_number_in_year'] = (
+            columns['iso8601_week_number_in_year'])
+    else:
+        # Week 1 is the week containing January 1, so a week belongs to the
+        # year its last day is in
+        week_year_begin = _ymd_to_ordinal(_ordinal_to_ymd(week_end)[0], 1, 1)
+        first_week_begin = week_year_begin - (
+            week_year_begin - week_start_weekday) % 7
+        columns['week_number_in_year'] = (
+            (week_begin - first_week_begin) // 7 + 1)
+    columns['week_number_in_month'] = (dom - 1) // 7 + 1
+    columns['week_label'] = np.array(
+        ['W%02d' % w for w in range(54)],
+        dtype=object)[columns['week_number_in_year']]
+    columns['week_begin_date'] = _isoformat(week_begin)
+    columns['week_begin_date_key'] = _date_key(week_begin)
+    columns['week_end_date'] = _isoformat(week_end)
+    columns['week_end_date_key'] = _date_key(week_end)
+
+    day_number_in_week = days_into_week + 1
+    columns['day_number_in_year'] = day_number_in_year
+    columns['day_number_in_month'] = dom
+    columns['day_number_in_week'] = day_number_in_week
+    columns['day_name'] = np.array(DAY_NAMES, dtype=object)[isoweekday - 1]
+    columns['day_abbreviation'] = np.array(DAY_ABBREVIATIONS,
+                                           dtype=object)[isoweekday - 1]
+    columns['is_weekday'] = _yes_no(isoweekday < 6)
+    columns['is_weekend'] = _yes_no(isoweekday > 5)
+    columns.update(_build_workday_columns(ordinals, y, year_begin,
+                                          month_begin, rule_set))
+    # Workweeks end on Friday, whichever day weeks start on
+    columns['is_last_day_in_workweek'] = _yes_no(isoweekday == 5)
+    columns['is_last_day_in_week'] = _yes_no(day_number_in_week == 7)
+    columns['is_last_day_in_month'] = _yes_no(dom == month_days)
+    columns['is_last_day_in_year'] = _yes_no((m == 12) & (dom == 31))
+
+    one_year_ago = ordinals - np.where(leap, 366, 365)
+    columns['one_year_ago_date'] = _isoformat(one_year_ago)
+    columns['one_year_ago_date_key'] = _date_key(one_year_ago)
+
+    columns.update(_build_holiday_columns(ordinals, y, rule_set))
+    return columns
+
+
+def _build_workday_columns(ordinals, years, year_begin, month_begin,
+                           rule_set=None):
+    workdays = get_business_calendar(
+        DEFAULT_RULE_SET if rule_set is None else rule_set)
+    workdays.cover(int(years[0]), int(years[-1]))
+    flags = np.frombuffer(bytes(workdays.flags), dtype=np.uint8)
+    counts = np.array(workdays.counts, dtype=np.int64)
+    i = ordinals - workdays.first_ordinal
+    return {
+        'is_workday': _yes_no(flags[i].astype(bool)),
+        'workday_number_in_month':
+            counts[i + 1] - counts[month_begin - workdays.first_ordinal],
+        'workday_number_in_year':
+            counts[i + 1] - counts[year_begin - workdays.first_ordinal],
+    }
+
+
+def _build_holiday_columns(ordinals, years, rule_set=None):
+    is_holiday = np.zeros(len(ordinals), dtype=bool)
+    holiday_name = np.empty(len(ordinals), dtype=object)
+    holiday_name.fill(NO_HOLIDAY)
+    holiday_names = holiday_name.copy()
+    holiday_count = np.zeros(len(ordinals), dtype=np.int64)
+    first_ordinal = ordinals[0]
+    for year in range(years[0], years[-1] + 1):
+        for holiday_date, names in get_holiday_index(int(year),
+                                                     rule_set).items():
+            i = holiday_date.toordinal() - first_ordinal
+            if 0 <= i < len(ordinals):
+                is_holiday[i] = True
+                holiday_name[i] = names[0]
+                holiday_names[i] = HOLIDAY_NAME_SEPARATOR.join(names)
+                holiday_count[i] = len(names)
+    return {
+        'is_holiday': _yes_no(is_holiday),
+        'holiday_name': holiday_name,
+        'holiday_names': holiday_names,
+        'holiday_count': holiday_count,
+    }
+
+
+def _build_season_columns(ordinals, season_calendar=None):
+    season_calendar = season_calendar or DEFAULT_SEASON_CALENDAR
+    # Each row counts the boundaries of its year it is on or after
+    years = _ordinal_to_ymd(ordinals)[0]
+    first_year = int(years.min())
+    boundaries = np.array([season_calendar.get_boundaries(year)
+                           for year in range(first_year, int(years.max()) + 1)],
+                          dtype=np.int64)
+    season = (ordinals[:, None] >= boundaries[years - first_year]).sum(axis=1)
+    return {
+        'season_name': np.array(season_calendar.names, dtype=object)[season],
+    }
+
+
+ARRAY_JD_TO_DATE = {
+    HIJRI: calendar_util_array.jd_to_islamic,
+    HEBREW: calendar_util_array.jd_to_hebrew,
+    PERSIAN: calendar_util_array.jd_to_persian,
+    INDIAN_CIVIL: calendar_util_array.jd_to_indian_civil,
+}
+
+
+def _build_alternate_calendar_columns(ordinals, name):
+    dates = ARRAY_JD_TO_DATE[name](ordinals + ORDINAL_EPOCH_JD)
+    y, m, d = dates['year'], dates['month'], dates['day']
+    name_index = m - 1
+    if name == HEBREW:
+        # Adar I, the last of get_month_names, is month 12 of leap years
+        name_index = np.where((m == 12) & ((y * 7 + 1) % 19 < 7), 13,
+                              name_index)
+    return {
+        name + '_year': y,
+        name + '_month': m,
+        name + '_day': d,
+        name + '_month_name': np.array(get_month_names(name),
+                                       dtype=object)[name_index],
+        name + '_year_month_key': y*100 + m,
+        name + '_date_key': y*10000 + m*100 + d,
+    }
+
+
+def _build_fiscal_columns(ordinals, fiscal_calendar=None):
+    fiscal_calendar = fiscal_calendar or DEFAULT_FISCAL_CALENDAR
+    # Every fiscal period overlapping the dates, with its quarter, half
+    # and year; each row then indexes the period containing it
+    periods = []
+    fiscal_year = fiscal_calendar.get_fiscal_year(
+        date.fromordinal(int(ordinals[0])))
+    while fiscal_year.first_ordinal <= ordinals[-1]:
+        for period in fiscal_year.periods:
+            p = period.number - 1
+            periods.append((fiscal_year, fiscal_year.halves[p // 6],
+                            fiscal_year.quarters[p // 3], period))
+        fiscal_year = fiscal_calendar.get_fiscal_year(
+            date.fromordinal(fiscal_year.last_ordinal + 1))
+    i = np.searchsorted(np.array([levels[3].first_ordinal
+                                  for levels in periods]),
+                        ordinals, side='right') - 1
+
+    def column(level, attr, dtype=np.int64):
+        return np.array([getattr(levels[level], attr) for levels in periods],
+                        dtype=dtype)[i]
+
+    columns = dict()
+    for level, prefix in enumerate(('fiscal_year', 'fiscal_half',
+                                    'fiscal_quarter', 'fiscal_period')):
+        columns[prefix + '_label'] = column(level, 'label', object)
+        columns[prefix + '_begin_date'] = column(level, 'begin_date', object)
+        columns[prefix + '_begin_date_key'] = column(level, 'begin_date_key')
+        columns[prefix + '_end_date'] = column(level, 'end_date', object)
+        columns[prefix + '_end_date_key'] = column(level, 'end_date_key')
+        columns[prefix + '_duration_in_days'] = column(level,
+                                                       'duration_in_days')
+    year_number = column(0, 'number')
+    period_number = column(3, 'number')
+    year_first, year_last = column(0, 'first_ordinal'), column(0, 'last_ordinal')
+    quarter_first = column(2, 'first_ordinal')
+    quarter_last = column(2, 'last_ordinal')
+    period_first = column(3, 'first_ordinal')
+    period_last = column(3, 'last_ordinal')
+    columns['fiscal_year_key'] = year_number
+    columns['fiscal_year_period_key'] = year_number*100 + period_number
+    columns['fiscal_weeks_in_year'] = column(0, 'weeks_in_year')
+    columns['fiscal_half_number_in_year'] = column(1, 'number')
+    columns['fiscal_quarter_number_in_year'] = column(2, 'number')
+    columns['fiscal_period_number_in_year'] = period_number
+    columns['fiscal_period_number_in_quarter'] = (period_number - 1) % 3 + 1
+    columns['fiscal_week_number_in_year'] = (ordinals - year_first) // 7 + 1
+    columns['fiscal_week_number_in_quarter'] = (
+        (ordinals - quarter_first) // 7 + 1)
+    columns['fiscal_week_number_in_period'] = (
+        (ordinals - period_first) // 7 + 1)
+    columns['fiscal_day_number_in_year'] = ordinals - year_first + 1
+    columns['fiscal_day_number_in_quarter'] = ordinals - quarter_first + 1
+    columns['fiscal_day_number_in_period'] = ordinals - period_first + 1
+    columns['is_last_day_in_fiscal_period'] = _yes_no(ordinals == period_last)
+    columns['is_last_day_in_fiscal_quarter'] = _yes_no(
+        ordinals == quarter_last)
+    columns['is_last_day_in_fiscal_year'] = _yes_no(ordinals == year_last)
+    return columns
+
+
+def build_columns(start, end, rule_set=None, fiscal_calendar=None,
+                  week_start=SUNDAY, season_calendar=None,
+                  alternate_calendars=None):
+    """Computes every DateDimension column for each date from start through
+    end (inclusive) and returns them as a dict of equal length arrays. The
+    holiday columns follow the holiday rule set given, if any, the fiscal
+    columns the fiscal calendar, the week columns week_start and the season
+    the season calendar. The columns of the alternate_calendars named are
+    added too."""
+    if np is None:
+        raise ImportError("numpy is required to build a DateDimensionFrame")
+    if end < start:
+        raise ValueError("end must not be before start")
+    ordinals = np.arange(start.toordinal(), end.toordinal() + 1,
+                         dtype=np.int64)
+    columns = _build_calendar_columns(ordinals, rule_set, week_start)
+    columns.update(_build_season_columns(ordinals, season_calendar))
+    columns.update(_build_fiscal_columns(ordinals, fiscal_calendar))
+    for name in alternate_calendars or ():
+        if name not in ARRAY_JD_TO_DATE:
+            raise ValueError("Unknown calendar: %s" % name)
+        columns.update(_build_alternate_calendar_columns(ordinals, name))
+    return columns
+
+
+class DateDimensionFrame(object):
+    """Columnar equivalent of generate_date_dimension(start - 1 day, end):
+    one row per date from start through end (inclusive), with the
+    *_number_in_epoch counters starting from the day before start."""
+
+    def __init__(self, start, end, rule_set=None, fiscal_calendar=None,
+                 week_start=SUNDAY, season_calendar=None,
+                 alternate_calendars=None):
+        self.start = start
+        self.end = end
+        # The day before start only anchors the epoch counters
+        self.columns = build_columns(start - timedelta(days=1), end, rule_set,
+                                     fiscal_calendar, week_start,
+                                     season_calendar, alternate_calendars)
+        for epoch_column, column in EPOCH_COUNTERS:
+            values = self.columns[column]
+            changes = np.zeros(len(values), dtype=np.int64)
+            changes[1:] = values[1:] != values[:-1]
+            self.columns[epoch_column] = np.cumsum(changes)
+        for k in self.columns:
+            self.columns[k] = self.columns[k][1:]
+
+    def __len__(self):
+        return len(self.columns['date_key'])
+
+    def column_names(self):
+        return sorted(self.columns.keys())
+
+    def rows(self):
+        """Yields each row as a dict shaped like DateDimension.columns."""
+        keys = self.column_names()
+        for values in zip(*[self.columns[k].tolist() for k in keys]):
+            yield dict(zip(keys, values))
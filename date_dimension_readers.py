@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reads the last row of an existing date dimension back from the dumps
+date_dimension_writers produces, so that the dimension can be extended."""
+
+import re
+import csv
+from generate_date_dimension import get_epoch_state
+
+
+SQL_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')      |
+    (?P<number>-?\d+(?:\.\d+)?)     |
+    (?P<word>[A-Za-z_][\w.]*|`[^`]*`|"[^"]*")  |
+    (?P<punct>[(),;])
+    )""", re.VERBOSE)
+
+
+def _row_order(columns):
+    return columns.get('full_date') or '%08d' % int(columns['date_key'])
+
+
+def _last_row(rows):
+    last = None
+    for columns in rows:
+        if last is None or _row_order(columns) >= _row_order(last):
+            last = columns
+    if last is None:
+        raise ValueError("The dump contains no rows")
+    return last
+
+
+## Delimited Dumps ##
+
+def iterate_csv_rows(f):
+    for columns in csv.DictReader(f):
+        yield dict((k, v if v != '' else None) for k, v in columns.items())
+
+
+def iterate_tsv_rows(f):
+    # TsvWriter output: a header line, then COPY text format
+    reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+    keys = next(reader)
+    for values in reader:
+        yield dict((k, v if v != '\\N' else None) for k, v in zip(keys, values))
+
+
+## SQL Dumps ##
+
+def iterate_sql_tokens(f):
+    pending = ''
+    for line in f:
+        pending += line
+        # Single quotes are balanced outside string literals, since quotes
+        # inside them are doubled; otherwise the literal continues
+        if pending.count("'") % 2:
+            continue
+        pos = 0
+        while True:
+            match = SQL_TOKEN.match(pending, pos)
+            if not match or match.end() == pos:
+                break
+            pos = match.end()
+            yield match.lastgroup, match.group(match.lastgroup)
+        pending = ''
+
+
+def _sql_value(kind, value):
+    if kind == 'string':
+        return value[1:-1].replace("''", "'")
+    elif kind == 'number':
+        return int(value) if value.lstrip('-').isdigit() else float(value)
+    elif value.upper() == 'NULL':
+        return None
+    raise ValueError("Unexpected SQL value: %s" % value)
+
+
+def iterate_sql_rows(f):
+    """Yields the columns of every row of the INSERT statements in f,
+    single-row or batched."""
+    keys = None
+    values = None
+    state = None
+    for kind, value in iterate_sql_tokens(f):
+        if kind == 'word' and value.upper() == 'INSERT':
+            state, keys = 'table', []
+        elif state == 'table':
+            if value == '(':
+                state = 'columns'
+        elif state == 'columns':
+            if value == ')':
+                state = 'values'
+            elif kind == 'word':
+                keys.append(value.strip('`"'))
+        elif state == 'values':
+            if value == '(':
+                state, values = 'row', []
+            elif value == ';':
+                state = None
+        elif state == 'row':
+            if value == ')':
+                yield dict(zip(keys, values))
+                state = 'values'
+            elif value != ',':
+                values.append(_sql_value(kind, value))
+
+
+READERS = {
+    'csv': iterate_csv_rows,
+    'tsv': iterate_tsv_rows,
+    'sql': iterate_sql_rows,
+}
+
+
+def read_last_row(f, fmt='csv'):
+    """Returns the columns of the latest dated row in the dump f."""
+    try:
+        reader = READERS[fmt]
+    except KeyError:
+        raise ValueError("Cannot read the %s format" % fmt)
+    return _last_row(reader(f))
+
+
+def read_epoch_state(f, fmt='csv'):
+    """Returns the date and *_number_in_epoch counters of the latest dated
+    row in the dump f, ready to pass to extend_date_dimension."""
+    return get_epoch_state(read_last_row(f, fmt))
@@ -0,0 +1,572 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import date
+from calendars.holidays import NO_HOLIDAY
+from calendars.holiday_rules import get_holiday_names
+from date_dimension import (MONTH_NAMES, MONTH_ABBREVIATIONS, DAY_NAMES,
+                            DAY_ABBREVIATIONS, SUNDAY)
+from alternate_calendars import ALTERNATE_CALENDARS, get_month_names
+from date_context import UNIX_EPOCH_ORDINAL
+from generate_date_dimension import (generate_date_dimension,
+                                     generate_date_dimension_parallel,
+                                     generate_holiday_bridge,
+                                     HOLIDAY_BRIDGE_COLUMNS,
+                                     generate_solar_table)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+DEFAULT_TABLE_NAME = 'date_dimension'
+DEFAULT_BRIDGE_TABLE_NAME = 'date_holiday_bridge'
+DEFAULT_SOLAR_TABLE_NAME = 'date_location_solar'
+DEFAULT_BATCH_SIZE = 1000
+# Rows buffered per write() by the bulk-load formats
+DEFAULT_BUFFER_ROWS = 10000
+
+# Rows per Arrow record batch and Parquet row group
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+# PostgreSQL COPY text format and MySQL LOAD DATA defaults
+COPY_NULL = '\\N'
+COPY_ESCAPES = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+
+
+## SQL Literals ##
+
+def sql_string(v):
+    return 'NULL' if v is None else "'%s'" % v.replace("'", "''")
+
+
+def sql_integer(v):
+    return 'NULL' if v is None else '%d' % v
+
+
+def sql_literal(v):
+    if isinstance(v, str):
+        return sql_string(v)
+    return sql_integer(v)
+
+
+def sql_formatter(v):
+    """Returns the function used to quote every value of a column, chosen
+    from a sample value of that column."""
+    if isinstance(v, str):
+        return sql_string
+    elif isinstance(v, (int, long)):
+        return sql_integer
+    return sql_literal
+
+
+## COPY/TSV Fields ##
+
+def copy_string(v):
+    if v is None:
+        return COPY_NULL
+    for c, escaped in COPY_ESCAPES:
+        if c in v:
+            v = v.replace(c, escaped)
+    return v
+
+
+def copy_integer(v):
+    return COPY_NULL if v is None else '%d' % v
+
+
+def copy_field(v):
+    if isinstance(v, str):
+        return copy_string(v)
+    return copy_integer(v)
+
+
+def copy_formatter(v):
+    if isinstance(v, str):
+        return copy_string
+    elif isinstance(v, (int, long)):
+        return copy_integer
+    return copy_field
+
+
+## CSV Fields ##
+#
+# RFC 4180: fields containing a comma, quote or line break are quoted, with
+# quotes doubled. NULL is an unquoted empty field, which both PostgreSQL's
+# CSV mode and MySQL read as NULL, so empty strings are always quoted.
+
+def csv_string(v):
+    if v is None:
+        return ''
+    if not v or ',' in v or '"' in v or '\n' in v or '\r' in v:
+        return '"%s"' % v.replace('"', '""')
+    return v
+
+
+def csv_integer(v):
+    return '' if v is None else '%d' % v
+
+
+def csv_field(v):
+    if isinstance(v, str):
+        return csv_string(v)
+    return csv_integer(v)
+
+
+def csv_formatter(v):
+    if isinstance(v, str):
+        return csv_string
+    elif isinstance(v, (int, long)):
+        return csv_integer
+    return csv_field
+
+
+## Writers ##
+
+class BatchWriter(object):
+    """Base class for streaming rows of date dimension columns to a file
+    object, batch_size rows per write. The column order (sorted unless
+    given) and each column's formatting are fixed by the first row."""
+
+    def __init__(self, f, batch_size, columns=None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.f = f
+        self.batch_size = batch_size
+        self.keys = list(columns) if columns else None
+        self.formatters = None
+        self.rows_written = 0
+
+    def formatter(self, v):
+        raise NotImplementedError
+
+    def start(self, columns):
+        if self.keys is None:
+            self.keys = sorted(columns.keys())
+        self.formatters = [self.formatter(columns[k]) for k in self.keys]
+
+    def format_row(self, columns):
+        raise NotImplementedError
+
+    def write_batch(self, batch):
+        raise NotImplementedError
+
+    def write_rows(self, rows):
+        """Writes each dict of columns in rows."""
+        batch = []
+        for columns in rows:
+            if self.formatters is None:
+                self.start(columns)
+            batch.append(self.format_row(columns))
+            if len(batch) == self.batch_size:
+                self.write_batch(batch)
+                self.rows_written += len(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+            self.rows_written += len(batch)
+        return self.rows_written
+
+    def write(self, date_dims):
+        """Writes each DateDimension in date_dims."""
+        return self.write_rows(dim.columns for dim in date_dims)
+
+    def close(self):
+        pass
+
+
+class SqlInsertWriter(BatchWriter):
+    """Writes multi-row INSERT statements of up to batch_size rows each."""
+
+    def __init__(self, f, table=DEFAULT_TABLE_NAME,
+                 batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        super(SqlInsertWriter, self).__init__(f, batch_size, columns)
+        self.table = table
+        self.insert = None
+
+    def formatter(self, v):
+        return sql_formatter(v)
+
+    def start(self, columns):
+        super(SqlInsertWriter, self).start(columns)
+        self.insert = "INSERT INTO %s (%s) VALUES\n" % (
+            self.table, ', '.join(self.keys))
+
+    def format_row(self, columns):
+        return '(%s)' % ', '.join([fmt(columns[k]) for k, fmt
+                                   in zip(self.keys, self.formatters)])
+
+    def write_batch(self, batch):
+        self.f.write(self.insert + ',\n'.join(batch) + ';\n')
+
+
+class DelimitedWriter(BatchWriter):
+    """Writes one line per row of delimited fields, optionally preceded by
+    a header line of column names."""
+
+    delimiter = '\t'
+    line_terminator = '\n'
+
+    def __init__(self, f, header=False, batch_size=DEFAULT_BUFFER_ROWS,
+                 columns=None):
+        super(DelimitedWriter, self).__init__(f, batch_size, columns)
+        self.header = header
+
+    def start(self, columns):
+        super(DelimitedWriter, self).start(columns)
+        if self.header:
+            self.f.write(self.delimiter.join(self.keys) + self.line_terminator)
+
+    def format_row(self, columns):
+        return self.delimiter.join([fmt(columns[k]) for k, fmt
+                                    in zip(self.keys, self.formatters)])
+
+    def write_batch(self, batch):
+        self.f.write(self.line_terminator.join(batch) + self.line_terminator)
+
+
+class CopyWriter(DelimitedWriter):
+    """Writes PostgreSQL COPY text format, for COPY date_dimension (columns)
+    FROM STDIN. Values are tab separated with backslash escapes and \\N for
+    NULL."""
+
+    def formatter(self, v):
+        return copy_formatter(v)
+
+
+class TsvWriter(CopyWriter):
+    """Writes tab separated values in the format MySQL's LOAD DATA INFILE
+    reads by default, which is also COPY text format, with a header line
+    (skip it with IGNORE 1 LINES)."""
+
+    def __init__(self, f, header=True, batch_size=DEFAULT_BUFFER_ROWS,
+                 columns=None):
+        super(TsvWriter, self).__init__(f, header, batch_size, columns)
+
+
+class CsvWriter(DelimitedWriter):
+    """Writes RFC 4180 CSV with CRLF line endings and a header line."""
+
+    delimiter = ','
+    line_terminator = '\r\n'
+
+    def __init__(self, f, header=True, batch_size=DEFAULT_BUFFER_ROWS,
+                 columns=None):
+        super(CsvWriter, self).__init__(f, header, batch_size, columns)
+
+    def formatter(self, v):
+        return csv_formatter(v)
+
+
+## Arrow Columns ##
+#
+# Keys and counters are int32, *_date columns date32 and is_* flags boolean.
+# Names drawn from a fixed vocabulary are dictionary encoded against it, so
+# that every record batch shares one dictionary.
+
+def dictionary_vocabularies(rule_set=None):
+    vocabularies = dict((name + '_month_name', get_month_names(name))
+                        for name in ALTERNATE_CALENDARS)
+    vocabularies.update({
+        'day_name': DAY_NAMES,
+        'day_abbreviation': DAY_ABBREVIATIONS,
+        'month_name': MONTH_NAMES,
+        'month_abbreviation': MONTH_ABBREVIATIONS,
+        'season_name': ['Winter', 'Spring', 'Summer', 'Fall'],
+        'holiday_name': sorted(set(get_holiday_names(rule_set))) +
+                        [NO_HOLIDAY],
+    })
+    return vocabularies
+
+
+def arrow_date32(v):
+    if v is None:
+        return None
+    return date(int(v[:4]), int(v[5:7]), int(v[8:10])).toordinal() - \
+        UNIX_EPOCH_ORDINAL
+
+
+def arrow_bool(v):
+    if v is None:
+        return None
+    return v == 'yes'
+
+
+def arrow_identity(v):
+    return v
+
+
+class DictionaryEncoder(object):
+    def __init__(self, column, vocabulary):
+        self.column = column
+        self.dictionary = pa.array(vocabulary, type=pa.string())
+        self.indices = dict((v, i) for i, v in enumerate(vocabulary))
+
+    def __call__(self, v):
+        if v is None:
+            return None
+        try:
+            return self.indices[v]
+        except KeyError:
+            raise ValueError("%r is not in the %s dictionary" %
+                             (v, self.column))
+
+    def to_array(self, values):
+        return pa.DictionaryArray.from_arrays(pa.array(values, type=pa.int32()),
+                                              self.dictionary)
+
+
+class RecordBatchBuilder(object):
+    """Builds typed Arrow record batches from rows of date dimension
+    columns. As for a BatchWriter, the column order (sorted unless given)
+    and each column's type are fixed by the first row."""
+
+    def __init__(self, columns=None, rule_set=None):
+        if pa is None:
+            raise ImportError("pyarrow is required to write Arrow or Parquet")
+        self.keys = list(columns) if columns else None
+        self.vocabularies = dictionary_vocabularies(rule_set)
+        self.schema = None
+        self.types = None
+        self.formatters = None
+
+    def column_type(self, k, v):
+        if k in self.vocabularies:
+            return pa.dictionary(pa.int32(), pa.string())
+        elif k.endswith('_date'):
+            return pa.date32()
+        elif k.startswith('is_'):
+            return pa.bool_()
+        elif isinstance(v, (int, long)):
+            return pa.int32()
+        return pa.string()
+
+    def start(self, columns):
+        if self.keys is None:
+            self.keys = sorted(columns.keys())
+        self.types = [self.column_type(k, columns[k]) for k in self.keys]
+        self.schema = pa.schema(zip(self.keys, self.types))
+        self.formatters = []
+        for k, t in zip(self.keys, self.types):
+            if k in self.vocabularies:
+                self.formatters.append(DictionaryEncoder(k,
+                                                         self.vocabularies[k]))
+            elif t == pa.date32():
+                self.formatters.append(arrow_date32)
+            elif t == pa.bool_():
+                self.formatters.append(arrow_bool)
+            else:
+                self.formatters.append(arrow_identity)
+
+    def format_row(self, columns):
+        return [fmt(columns[k]) for k, fmt in zip(self.keys, self.formatters)]
+
+    def make_record_batch(self, batch):
+        arrays = []
+        for values, t, fmt in zip(zip(*batch), self.types, self.formatters):
+            if isinstance(fmt, DictionaryEncoder):
+                arrays.append(fmt.to_array(values))
+            else:
+                arrays.append(pa.array(values, type=t))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class ArrowWriter(BatchWriter):
+    """Base class for writing rows as typed Arrow record batches of up to
+    batch_size rows each, which bounds memory use for long ranges."""
+
+    def __init__(self, f, batch_size=DEFAULT_ROW_GROUP_SIZE, columns=None,
+                 rule_set=None):
+        self.builder = RecordBatchBuilder(columns, rule_set)
+        super(ArrowWriter, self).__init__(f, batch_size, columns)
+
+    def start(self, columns):
+        self.builder.start(columns)
+        self.keys = self.builder.keys
+        self.formatters = self.builder.formatters
+
+    def format_row(self, columns):
+        return self.builder.format_row(columns)
+
+    def write_batch(self, batch):
+        self.write_record_batch(self.builder.make_record_batch(batch))
+
+    def write_record_batch(self, record_batch):
+        raise NotImplementedError
+
+
+class ParquetWriter(ArrowWriter):
+    """Writes a Parquet file with one row group per batch_size rows."""
+
+    def __init__(self, f, batch_size=DEFAULT_ROW_GROUP_SIZE, columns=None,
+                 compression='snappy', rule_set=None):
+        super(ParquetWriter, self).__init__(f, batch_size, columns, rule_set)
+        self.compression = compression
+        self.writer = None
+
+    def write_record_batch(self, record_batch):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.f, self.builder.schema,
+                                           compression=self.compression)
+        self.writer.write_table(pa.Table.from_batches([record_batch]))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ArrowIpcWriter(ArrowWriter):
+    """Writes an Arrow IPC file (Feather version 2) of record batches."""
+
+    def __init__(self, f, batch_size=DEFAULT_ROW_GROUP_SIZE, columns=None,
+                 rule_set=None):
+        super(ArrowIpcWriter, self).__init__(f, batch_size, columns, rule_set)
+        self.writer = None
+
+    def write_record_batch(self, record_batch):
+        if self.writer is None:
+            self.writer = pa.RecordBatchFileWriter(self.f,
+                                                   self.builder.schema)
+        self.writer.write_batch(record_batch)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def generate_record_batches(start, end, batch_size=DEFAULT_ROW_GROUP_SIZE,
+                            rule_set=None, fiscal_calendar=None, columns=None,
+                            week_start=SUNDAY, season_calendar=None,
+                            alternate_calendars=None):
+    """Generates the date dimension for the range specified as Arrow record
+    batches of up to batch_size rows, of only the columns listed if any."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    builder = RecordBatchBuilder(columns, rule_set)
+    batch = []
+    date_dims = generate_date_dimension(
+        start, end, rule_set=rule_set, fiscal_calendar=fiscal_calendar,
+        columns=columns, week_start=week_start,
+        season_calendar=season_calendar,
+        alternate_calendars=alternate_calendars)
+    for dim in date_dims:
+        if builder.formatters is None:
+            builder.start(dim.columns)
+        batch.append(builder.format_row(dim.columns))
+        if len(batch) == batch_size:
+            yield builder.make_record_batch(batch)
+            batch = []
+    if batch:
+        yield builder.make_record_batch(batch)
+
+
+WRITERS = {
+    'sql': SqlInsertWriter,
+    'copy': CopyWriter,
+    'tsv': TsvWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowIpcWriter,
+}
+
+
+def write_date_dimension(f, start, end, fmt='sql', workers=None, epoch=None,
+                         rule_set=None, fiscal_calendar=None,
+                         week_start=SUNDAY, season_calendar=None,
+                         alternate_calendars=None, **kwargs):
+    """Generates the date dimension for the range specified and streams it
+    to f in the format named, passing any keyword arguments to the writer.
+    More than one worker generates the rows in that many processes, epoch
+    gives the counters to continue from, rule_set selects the holiday rules,
+    fiscal_calendar the fiscal years, week_start the day weeks begin on,
+    season_calendar the seasons and alternate_calendars the calendars to add
+    columns for.
+    A columns list given to the writer also limits the columns generated.
+    Returns the number of rows."""
+    try:
+        writer_class = WRITERS[fmt]
+    except KeyError:
+        raise ValueError("Unknown output format: %s" % fmt)
+    if issubclass(writer_class, ArrowWriter):
+        kwargs['rule_set'] = rule_set
+    writer = writer_class(f, **kwargs)
+    options = dict(rule_set=rule_set, fiscal_calendar=fiscal_calendar,
+                   columns=kwargs.get('columns'), week_start=week_start,
+                   season_calendar=season_calendar,
+                   alternate_calendars=alternate_calendars)
+    if workers and workers > 1:
+        date_dims = generate_date_dimension_parallel(start, end, epoch,
+                                                     workers=workers,
+                                                     **options)
+    else:
+        date_dims = generate_date_dimension(start, end, epoch, **options)
+    try:
+        return writer.write(date_dims)
+    finally:
+        writer.close()
+
+
+def write_insert_statements(f, start, end, table=DEFAULT_TABLE_NAME,
+                            batch_size=DEFAULT_BATCH_SIZE):
+    """Generates the date dimension for the range specified and streams it
+    to f as batched INSERT statements. Returns the number of rows."""
+    return write_date_dimension(f, start, end, 'sql', table=table,
+                                batch_size=batch_size)
+
+
+def write_holiday_bridge(f, start, end, fmt='sql', rule_set=None, **kwargs):
+    """Streams the holiday bridge rows for the range specified to f in the
+    format named, one row per holiday per day. Returns the number of
+    rows."""
+    try:
+        writer_class = WRITERS[fmt]
+    except KeyError:
+        raise ValueError("Unknown output format: %s" % fmt)
+    unknown = [k for k in kwargs.get('columns') or ()
+               if k not in HOLIDAY_BRIDGE_COLUMNS]
+    if unknown:
+        raise ValueError("Unknown columns: %s" % ', '.join(unknown))
+    if writer_class is SqlInsertWriter:
+        kwargs.setdefault('table', DEFAULT_BRIDGE_TABLE_NAME)
+    elif issubclass(writer_class, ArrowWriter):
+        kwargs['rule_set'] = rule_set
+    writer = writer_class(f, **kwargs)
+    try:
+        return writer.write_rows(generate_holiday_bridge(start, end,
+                                                         rule_set))
+    finally:
+        writer.close()
+
+
+def write_solar_table(f, start, end, locations, fmt='sql', ephemeris=None,
+                      **kwargs):
+    """Streams the solar table rows for the range and locations specified
+    to f in the format named, one row per location per day. Returns the
+    number of rows."""
+    try:
+        writer_class = WRITERS[fmt]
+    except KeyError:
+        raise ValueError("Unknown output format: %s" % fmt)
+    if writer_class is SqlInsertWriter:
+        kwargs.setdefault('table', DEFAULT_SOLAR_TABLE_NAME)
+    writer = writer_class(f, **kwargs)
+    try:
+        return writer.write_rows(generate_solar_table(start, end, locations,
+                                                      ephemeris))
+    finally:
+        writer.close()
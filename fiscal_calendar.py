@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fiscal calendars: fiscal years beginning on any month and day and split
+into twelve monthly periods, or retail 52/53-week years split into 4-4-5,
+4-5-4 or 5-4-4 week periods. The period boundaries of each fiscal year are
+computed once and shared by every date in it."""
+
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, timedelta, MINYEAR, MAXYEAR
+from date_context import PeriodContext
+from calendars.holidays import SAT
+
+# Weeks in each period of a quarter
+PATTERNS = {
+    '445': (4, 4, 5),
+    '454': (4, 5, 4),
+    '544': (5, 4, 4),
+}
+
+FiscalDate = namedtuple('FiscalDate', 'year period day')
+
+
+class FiscalYear(PeriodContext):
+    """A fiscal year's begin and end dates and its periods, quarters and
+    halves. number is the year the fiscal year is named for."""
+
+    def __init__(self, number, first_day, last_day, period_bounds):
+        super(FiscalYear, self).__init__(number, first_day, last_day,
+                                         'FY%d' % number)
+        self.weeks_in_year = (self.duration_in_days + 6) // 7
+        self.periods = tuple(
+            PeriodContext(p, first, last, 'FP%02d%d' % (p, number))
+            for p, (first, last) in enumerate(period_bounds, 1))
+        self.quarters = tuple(
+            PeriodContext(q, self.periods[q*3-3].first_day,
+                          self.periods[q*3-1].last_day, 'FQ%d%d' % (q, number))
+            for q in range(1, 5))
+        self.halves = tuple(
+            PeriodContext(h, self.periods[h*6-6].first_day,
+                          self.periods[h*6-1].last_day, 'FS%d%d' % (h, number))
+            for h in range(1, 3))
+        self.period_first_ordinals = [p.first_ordinal for p in self.periods]
+        self._period_columns = [None] * len(self.periods)
+
+    def get_period(self, ordinal):
+        """Returns the period containing the ordinal, by binary search."""
+        return self.periods[
+            bisect_right(self.period_first_ordinals, ordinal) - 1]
+
+    def get_period_columns(self, period):
+        """Returns the fiscal_* columns shared by every day of the period:
+        the labels, keys, numbers and bounds of it, its quarter and half,
+        and the fiscal year."""
+        columns = self._period_columns[period.number - 1]
+        if columns is None:
+            p = period.number - 1
+            columns = dict()
+            for prefix, context in (('fiscal_year', self),
+                                    ('fiscal_half', self.halves[p // 6]),
+                                    ('fiscal_quarter', self.quarters[p // 3]),
+                                    ('fiscal_period', period)):
+                columns[prefix + '_label'] = context.label
+                columns[prefix + '_begin_date'] = context.begin_date
+                columns[prefix + '_begin_date_key'] = context.begin_date_key
+                columns[prefix + '_end_date'] = context.end_date
+                columns[prefix + '_end_date_key'] = context.end_date_key
+                columns[prefix + '_duration_in_days'] = context.duration_in_days
+            columns['fiscal_year_key'] = self.number
+            columns['fiscal_year_period_key'] = self.number*100 + period.number
+            columns['fiscal_weeks_in_year'] = self.weeks_in_year
+            columns['fiscal_half_number_in_year'] = p // 6 + 1
+            columns['fiscal_quarter_number_in_year'] = p // 3 + 1
+            columns['fiscal_period_number_in_year'] = period.number
+            columns['fiscal_period_number_in_quarter'] = p % 3 + 1
+            self._period_columns[p] = columns
+        return columns
+
+
+class FiscalCalendar(object):
+    """A fiscal year begins on start_month and start_day (1 to 28). With no
+    pattern its twelve periods are the months beginning on start_day.
+
+    With a pattern ('445', '454' or '544') the year is 52 or 53 whole weeks
+    ending on week_end_weekday (MON..SUN): the last one in the month before
+    start_month or, if nearest is set, the one nearest that month's end. A
+    53rd week is added to the last period.
+
+    Fiscal years are named for the calendar year they end in, or with
+    name_by='start' for the year they begin in."""
+
+    def __init__(self, start_month=1, start_day=1, pattern=None,
+                 week_end_weekday=SAT, nearest=False, name_by='end'):
+        if not 1 <= start_month <= 12:
+            raise ValueError("start_month must be 1 to 12")
+        if not 1 <= start_day <= 28:
+            raise ValueError("start_day must be 1 to 28")
+        if pattern is not None and pattern not in PATTERNS:
+            raise ValueError("Unknown fiscal pattern: %s" % pattern)
+        if name_by not in ('end', 'start'):
+            raise ValueError("name_by must be 'end' or 'start'")
+        self.start_month = start_month
+        self.start_day = start_day
+        self.pattern = pattern
+        self.week_end_weekday = week_end_weekday
+        self.nearest = nearest
+        self.name_by = name_by
+        # {reference year: FiscalYear}
+        self._years = dict()
+
+    def _year_end(self, year):
+        # The last day of the fiscal year ending in (or, for a nearest
+        # week, around) the end of the month before start_month of year
+        if self.pattern is None:
+            if self.start_month == 1 and self.start_day == 1:
+                return date(year, 12, 31)
+            return date(year, self.start_month, self.start_day) - timedelta(1)
+        if self.start_month == 1:
+            month_end = date(year, 12, 31)
+        else:
+            month_end = date(year, self.start_month, 1) - timedelta(1)
+        last = month_end - timedelta(
+            (month_end.weekday() - self.week_end_weekday) % 7)
+        if self.nearest and (month_end - last).days > 3:
+            last += timedelta(7)
+        return last
+
+    def _begins_in_previous_year(self):
+        # Whether most of a fiscal year's first days fall in the calendar
+        # year before the one its end is reckoned from
+        if self.pattern is None:
+            return not (self.start_month == 1 and self.start_day == 1)
+        return self.start_month != 1
+
+    def _period_bounds(self, first_day, last_day):
+        # The first ordinal of each period and of the next fiscal year, which
+        # as an ordinal may follow date.max
+        if self.pattern is None:
+            bounds = []
+            for p in range(12):
+                month = (self.start_month - 1 + p) % 12 + 1
+                year = first_day.year + (self.start_month - 1 + p) // 12
+                bounds.append(date(year, month, self.start_day).toordinal())
+        else:
+            bounds = [first_day.toordinal()]
+            for weeks in (PATTERNS[self.pattern] * 4)[:11]:
+                bounds.append(bounds[-1] + weeks * 7)
+        # A 53rd week belongs to the last period
+        bounds.append(last_day.toordinal() + 1)
+        return [(date.fromordinal(bounds[i]), date.fromordinal(bounds[i+1] - 1))
+                for i in range(12)]
+
+    def get_fiscal_year_by_reference(self, year):
+        fiscal_year = self._years.get(year)
+        if fiscal_year is None:
+            first_day = self._year_end(year - 1) + timedelta(1)
+            last_day = self._year_end(year)
+            number = year
+            if self.name_by == 'start' and self._begins_in_previous_year():
+                number = year - 1
+            fiscal_year = self._years[year] = FiscalYear(
+                number, first_day, last_day,
+                self._period_bounds(first_day, last_day))
+        return fiscal_year
+
+    def get_fiscal_year(self, d):
+        """Returns the FiscalYear containing d."""
+        ordinal = d.toordinal()
+        for year in (d.year, d.year + 1, d.year - 1):
+            if not MINYEAR <= year <= MAXYEAR:
+                continue
+            fiscal_year = self.get_fiscal_year_by_reference(year)
+            if fiscal_year.first_ordinal <= ordinal <= fiscal_year.last_ordinal:
+                return fiscal_year
+        raise ValueError("No fiscal year contains %s" % d)
+
+    def get_fiscal_year_named(self, number):
+        """Returns the FiscalYear named number."""
+        if self.name_by == 'start' and self._begins_in_previous_year():
+            return self.get_fiscal_year_by_reference(number + 1)
+        return self.get_fiscal_year_by_reference(number)
+
+    def to_fiscal_date(self, d):
+        """Returns d as a FiscalDate: fiscal year, period and day number in
+        the period."""
+        fiscal_year = self.get_fiscal_year(d)
+        period = fiscal_year.get_period(d.toordinal())
+        return FiscalDate(fiscal_year.number, period.number,
+                          d.toordinal() - period.first_ordinal + 1)
+
+    def from_fiscal_date(self, fd):
+        """Returns the calendar date of a FiscalDate."""
+        year, period_number, day = fd
+        period = self.get_fiscal_year_named(year).periods[period_number - 1]
+        if not 1 <= day <= period.duration_in_days:
+            raise ValueError("Day %d is not in fiscal period %d of %d" %
+                             (day, period_number, year))
+        return date.fromordinal(period.first_ordinal + day - 1)
+
+    def cache_clear(self):
+        """Forgets the fiscal years computed so far."""
+        self._years.clear()
+
+
+# Fiscal years that are calendar years, for dimensions without a fiscal
+# calendar of their own
+DEFAULT_FISCAL_CALENDAR = FiscalCalendar()
@@ -3,7 +3,23 @@
 import sys
 import os
 import datetime
-from date_dimension import DateDimension
+import multiprocessing
+from date_dimension import DateDimension, SUNDAY, get_row_type
+from date_context import make_date_key
+from calendars.holiday_rules import get_holiday_index
+from solar import DEFAULT_SOLAR_EPHEMERIS, get_solar_columns
+
+
+# Each *_number_in_epoch counter advances whenever its column changes from
+# one day to the next
+EPOCH_COUNTERS = (
+    ('year_number_in_epoch', 'year_key'),
+    ('half_number_in_epoch', 'half_number_in_year'),
+    ('quarter_number_in_epoch', 'quarter_number_in_year'),
+    ('month_number_in_epoch', 'month_number_in_year'),
+    ('week_number_in_epoch', 'week_number_in_year'),
+    ('day_number_in_epoch', 'day_number_in_year'),
+)
 
 
 def iterate_calendar(start, end):
@@ -14,40 +30,406 @@ def iterate_calendar(start, end):
         yield curr
 
 
-def generate_date_dimension(start, end=datetime.date(2020,12,31)):
-    e = {
-        'year_number_in_epoch': 0,
-        'half_number_in_epoch': 0,
-        'quarter_number_in_epoch': 0,
-        'month_number_in_epoch': 0,
-        'week_number_in_epoch': 0,
-        'day_number_in_epoch': 0,
-    }
-    prev_date_dim = DateDimension(start)
+def get_projection(columns=None):
+    """Returns the EPOCH_COUNTERS among columns, the other columns, and the
+    column names a DateDimension must compute for both; None for all."""
+    if columns is None:
+        return EPOCH_COUNTERS, None, None
+    counters = tuple((k, column) for k, column in EPOCH_COUNTERS
+                     if k in columns)
+    epoch_columns = set(k for k, column in EPOCH_COUNTERS)
+    projected = [k for k in columns if k not in epoch_columns]
+    computed = projected + [column for k, column in counters
+                            if column not in projected]
+    return counters, projected, computed
+
+
+def generate_date_dimension(start, end=datetime.date(2020,12,31), epoch=None,
+                            compact=False, rule_set=None,
+                            fiscal_calendar=None, columns=None,
+                            week_start=SUNDAY, season_calendar=None,
+                            alternate_calendars=None):
+    """Yields a DateDimension (or, if compact, a row) for each date after
+    start through end. columns, a list of column names, limits the rows to
+    those columns, and no others are computed. week_start is SUNDAY, MONDAY
+    or ISO, season_calendar a SeasonCalendar, and alternate_calendars names
+    the calendars (HIJRI, HEBREW, ...) whose columns full rows include."""
+    counters, projected, computed = get_projection(columns)
+    e = dict((k, 0) for k, column in counters)
+    if epoch:
+        e.update((k, v) for k, v in epoch.items() if k in e)
+    options = dict(week_start=week_start, season_calendar=season_calendar,
+                   alternate_calendars=alternate_calendars)
+    prev = DateDimension(start, rule_set, fiscal_calendar, computed,
+                         **options).columns
     for d in iterate_calendar(start, end):
-        date_dim = DateDimension(d)
-        if date_dim.columns['year_key'] != prev_date_dim.columns['year_key']:
-            e['year_number_in_epoch'] += 1
-        if date_dim.columns['half_number_in_year'] != prev_date_dim.columns['half_number_in_year']:
-            e['half_number_in_epoch'] += 1
-        if date_dim.columns['quarter_number_in_year'] != prev_date_dim.columns['quarter_number_in_year']:
-            e['quarter_number_in_epoch'] += 1
-        if date_dim.columns['month_number_in_year'] != prev_date_dim.columns['month_number_in_year']:
-            e['month_number_in_epoch'] += 1
-        if date_dim.columns['week_number_in_year'] != prev_date_dim.columns['week_number_in_year']:
-            e['week_number_in_epoch'] += 1
-        if date_dim.columns['day_number_in_year'] != prev_date_dim.columns['day_number_in_year']:
-            e['day_number_in_epoch'] += 1
+        date_dim = DateDimension(d, rule_set, fiscal_calendar, computed,
+                                 **options)
+        curr = date_dim.columns
+        for k, column in counters:
+            if curr[column] != prev[column]:
+                e[k] += 1
+        prev = curr
+        if computed is not None and len(computed) > len(projected):
+            # Drop the columns computed only for the epoch counters
+            date_dim.columns = dict((k, curr[k]) for k in projected)
         for k in e.keys():
             date_dim.columns[k] = e[k]
-        prev_date_dim = date_dim
-        yield date_dim
+        yield date_dim.to_row() if compact else date_dim
+
+
+## Incremental Generation ##
+
+def get_epoch_state(columns):
+    """Returns the date and *_number_in_epoch counters of a row of columns,
+    which is all that is needed to continue the dimension after it."""
+    missing = [k for k, column in EPOCH_COUNTERS if columns.get(k) is None]
+    if missing:
+        raise ValueError("Row is missing %s" % ', '.join(missing))
+    if columns.get('full_date'):
+        y, m, d = columns['full_date'].split('-')
+    elif columns.get('date_key'):
+        key = int(columns['date_key'])
+        y, m, d = key // 10000, key // 100 % 100, key % 100
+    else:
+        raise ValueError("Row has neither a full_date nor a date_key")
+    return (datetime.date(int(y), int(m), int(d)),
+            dict((k, int(columns[k])) for k, column in EPOCH_COUNTERS))
+
+
+def extend_date_dimension(last, end, epoch=None, compact=False,
+                          rule_set=None, fiscal_calendar=None, columns=None,
+                          week_start=SUNDAY, season_calendar=None,
+                          alternate_calendars=None):
+    """Yields only the rows after an existing dimension's last row, through
+    end, with its *_number_in_epoch counters continuing from that row. last
+    is either the last row's columns or its date, in which case epoch holds
+    its counters."""
+    if isinstance(last, datetime.date):
+        if epoch is None:
+            raise ValueError("The last row's epoch counters are required")
+        last_date = last
+    else:
+        last_date, epoch = get_epoch_state(getattr(last, 'columns', last))
+    return generate_date_dimension(last_date, end, epoch, compact, rule_set,
+                                   fiscal_calendar, columns, week_start,
+                                   season_calendar, alternate_calendars)
+
+
+## Holiday Bridge ##
+
+HOLIDAY_BRIDGE_COLUMNS = ('date_key', 'holiday_name', 'holiday_rank')
+
+
+def generate_holiday_bridge(start, end=datetime.date(2020,12,31),
+                            rule_set=None):
+    """Yields a row for every holiday falling on the dates
+    generate_date_dimension(start, end) yields, keyed by date_key, so that
+    a day with several holidays has several rows. holiday_rank orders a
+    day's holidays; rank 1 is the day's holiday_name."""
+    for year in range(start.year, end.year + 1):
+        index = get_holiday_index(year, rule_set)
+        for d in sorted(index):
+            if start < d <= end and d.year == year:
+                for rank, name in enumerate(index[d], 1):
+                    yield {
+                        'date_key': make_date_key(d),
+                        'holiday_name': name,
+                        'holiday_rank': rank,
+                    }
+
+
+## Solar Table ##
+
+def generate_solar_table(start, end=datetime.date(2020,12,31), locations=(),
+                         ephemeris=None):
+    """Yields a row for every location (a solar.Location) on each of the
+    dates generate_date_dimension(start, end) yields, keyed by date_key and
+    location_key, with the day's sunrise, sunset, solar noon and day length
+    there. The Sun's position is looked up once per day, in ephemeris (a
+    solar.SolarEphemeris) or the shared one, for all of the locations."""
+    ephemeris = ephemeris or DEFAULT_SOLAR_EPHEMERIS
+    for d in iterate_calendar(start, end):
+        date_key = make_date_key(d)
+        day = ephemeris.get_day(d)
+        for location in locations:
+            row = get_solar_columns(location, day)
+            row['date_key'] = date_key
+            row['location_key'] = location.key
+            yield row
+
+
+## Parallel Generation ##
+
+def split_by_year(start, end, years=1):
+    """Splits the dates generate_date_dimension(start, end) yields into
+    (start, end) ranges of the same form, each covering up to the number of
+    calendar years specified."""
+    chunks = []
+    one_day = datetime.timedelta(days=1)
+    while start < end:
+        chunk_end = min(end, datetime.date((start + one_day).year + years - 1,
+                                           12, 31))
+        chunks.append((start, chunk_end))
+        start = chunk_end
+    return chunks
+
+
+def _generate_chunk(args):
+    # Counters are local to the chunk; the parent offsets them. Rows go back
+    # as the chunk's column names and a tuple of values per day after start,
+    # in that order, which pickle far smaller than DateDimension objects
+    (start, end), rule_set, fiscal_calendar, columns, options = args
+    names = None
+    rows = []
+    for row in generate_date_dimension(start, end, compact=True,
+                                       rule_set=rule_set,
+                                       fiscal_calendar=fiscal_calendar,
+                                       columns=columns, **options):
+        names = row._fields
+        rows.append(tuple(row))
+    return start, names, rows
+
+
+def generate_date_dimension_parallel(start, end=datetime.date(2020,12,31),
+                                     epoch=None, compact=False, workers=None,
+                                     years=1, rule_set=None,
+                                     fiscal_calendar=None, columns=None,
+                                     week_start=SUNDAY, season_calendar=None,
+                                     alternate_calendars=None):
+    """Yields the same rows as generate_date_dimension, in order, built in a
+    pool of worker processes a chunk of years at a time. Each chunk counts
+    its *_number_in_epoch values from zero, and they are shifted by the
+    running totals of the chunks before it."""
+    counters = get_projection(columns)[0]
+    offsets = dict((k, 0) for k, column in counters)
+    if epoch:
+        offsets.update((k, v) for k, v in epoch.items() if k in offsets)
+    pool = multiprocessing.Pool(workers)
+    try:
+        options = dict(week_start=week_start, season_calendar=season_calendar,
+                       alternate_calendars=alternate_calendars)
+        chunks = [(chunk, rule_set, fiscal_calendar, columns, options)
+                  for chunk in split_by_year(start, end, years)]
+        for chunk_start, names, rows in pool.imap(_generate_chunk, chunks):
+            if not rows:
+                continue
+            row_type = get_row_type(names)
+            counter_indexes = [(names.index(k), k) for k in offsets]
+            ordinal = chunk_start.toordinal()
+            for values in rows:
+                ordinal += 1
+                if counter_indexes:
+                    values = list(values)
+                    for i, k in counter_indexes:
+                        values[i] += offsets[k]
+                if compact:
+                    yield row_type(*values)
+                else:
+                    # Rebuilt around the columns, which are not recomputed
+                    d = datetime.date.fromordinal(ordinal)
+                    date_dim = DateDimension(d, rule_set, fiscal_calendar,
+                                             lazy=True, **options)
+                    date_dim.columns = dict(zip(names, values))
+                    yield date_dim
+            offsets = dict((k, values[i]) for i, k in counter_indexes)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+## Command Line ##
+
+def parse_date(s):
+    """Parses a YYYY-MM-DD date."""
+    return datetime.datetime.strptime(s, '%Y-%m-%d').date()
+
+
+def parse_month_day(s):
+    """Parses an MM-DD month and day as a (month, day) tuple."""
+    month, day = s.split('-')
+    return int(month), int(day)
+
+
+def parse_names(s):
+    """Parses a comma-separated list of names."""
+    return [name.strip() for name in s.split(',') if name.strip()]
+
+
+# The writer options each apply to only some formats
+FORMAT_OPTIONS = {
+    'table': ('sql',),
+    'no_header': ('csv', 'tsv'),
+    'compression': ('parquet',),
+}
 
 
 if __name__ == '__main__':
-    #with open('date_dimension_inserts.sql', 'w') as f:
-    #    for dim in generate_date_dimension(datetime.date(2000, 1, 1)):
-    #        f.write(dim.generate_insert_statement())
-    sys.stdout.write(sql)
-    sys.stdout.flush()
+    import argparse
+    from calendars.holidays import MON, TUE, WED, THU, FRI, SAT, SUN
+    from calendars.holiday_rules import RULE_SETS
+    from date_dimension import WEEK_START_WEEKDAYS
+    from fiscal_calendar import FiscalCalendar, PATTERNS
+    from seasons import (SeasonCalendar, SEASON_KINDS, SEASON_NAMES,
+                         ASTRONOMICAL, NORTHERN)
+    from alternate_calendars import ALTERNATE_CALENDARS
+    from date_dimension_writers import (WRITERS, write_date_dimension,
+                                        write_holiday_bridge)
+    weekdays = {'mon': MON, 'tue': TUE, 'wed': WED, 'thu': THU, 'fri': FRI,
+                'sat': SAT, 'sun': SUN}
+
+    parser = argparse.ArgumentParser(description="Generate a date dimension "
+                                                 "table")
+    parser.add_argument('first', metavar='FIRST_DATE', type=parse_date,
+                        help='the first date (in YYYY-MM-DD format)')
+    parser.add_argument('last', metavar='LAST_DATE', type=parse_date,
+                        help='the last date (in YYYY-MM-DD format)')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='sql',
+                        help='output format (default: %(default)s)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='write to FILE, which is replaced only once the '
+                             'table is complete (default: stdout)')
+    parser.add_argument('--columns', type=parse_names,
+                        help='comma-separated columns to generate, in order '
+                             '(default: all)')
+    parser.add_argument('--batch-size', type=int,
+                        help='rows per INSERT statement, write or Arrow '
+                             'record batch (default: the format\'s own)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes generating rows (default: 1)')
+    parser.add_argument('--table',
+                        help='table name for --format sql')
+    parser.add_argument('--no-header', action='store_true',
+                        help='omit the header line of --format csv or tsv')
+    parser.add_argument('--compression',
+                        help='codec for --format parquet (default: snappy)')
+    parser.add_argument('--holiday-bridge', action='store_true',
+                        help='write the holiday bridge table, one row per '
+                             'holiday per day, instead')
+    parser.add_argument('--rule-set', choices=sorted(RULE_SETS),
+                        help='holiday rules (default: every holiday)')
+    parser.add_argument('--week-start', choices=sorted(WEEK_START_WEEKDAYS),
+                        default=SUNDAY,
+                        help='day weeks begin on, or iso for ISO weeks '
+                             '(default: %(default)s)')
+    parser.add_argument('--fiscal-start', metavar='MM-DD',
+                        type=parse_month_day, default=(1, 1),
+                        help='first day of the fiscal year (default: 01-01)')
+    parser.add_argument('--fiscal-pattern', choices=sorted(PATTERNS),
+                        help='weeks per period of a 52/53-week fiscal year '
+                             '(default: calendar months)')
+    parser.add_argument('--fiscal-week-end', choices=sorted(weekdays),
+                        default='sat',
+                        help='last day of a fiscal week with '
+                             '--fiscal-pattern (default: %(default)s)')
+    parser.add_argument('--fiscal-nearest', action='store_true',
+                        help='end 52/53-week fiscal years on the week end '
+                             'nearest the month end, not the last before it')
+    parser.add_argument('--fiscal-name-by', choices=('end', 'start'),
+                        default='end',
+                        help='name fiscal years for the calendar year they '
+                             'end or start in (default: %(default)s)')
+    parser.add_argument('--seasons', choices=SEASON_KINDS,
+                        default=ASTRONOMICAL,
+                        help='season boundaries (default: %(default)s)')
+    parser.add_argument('--hemisphere', choices=sorted(SEASON_NAMES),
+                        default=NORTHERN,
+                        help='hemisphere the seasons are named for '
+                             '(default: %(default)s)')
+    parser.add_argument('--season-utc-offset', metavar='HOURS', type=float,
+                        default=0,
+                        help='time zone of astronomical season days '
+                             '(default: UTC)')
+    parser.add_argument('--calendars', type=parse_names,
+                        help='comma-separated alternate calendars to add '
+                             'columns for: %s' % ', '.join(ALTERNATE_CALENDARS))
+    args = parser.parse_args()
+
+    if args.last < args.first:
+        parser.error("LAST_DATE is before FIRST_DATE")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.columns is not None and not args.columns:
+        parser.error("--columns names no columns")
+    if args.holiday_bridge:
+        if args.workers != 1:
+            parser.error("--workers does not apply to --holiday-bridge")
+        unknown = [k for k in args.columns or ()
+                   if k not in HOLIDAY_BRIDGE_COLUMNS]
+        if unknown:
+            parser.error("unknown --holiday-bridge columns: %s; choose from "
+                         "%s" % (', '.join(unknown),
+                                 ', '.join(HOLIDAY_BRIDGE_COLUMNS)))
+    for option, formats in sorted(FORMAT_OPTIONS.items()):
+        if getattr(args, option) and args.format not in formats:
+            parser.error("--%s applies only to --format %s" %
+                         (option.replace('_', '-'), ' or '.join(formats)))
+    for name in args.calendars or ():
+        if name not in ALTERNATE_CALENDARS:
+            parser.error("unknown calendar: %s" % name)
+    try:
+        if args.columns and not args.holiday_bridge:
+            # Raises on unknown columns before anything is written
+            DateDimension.get_projection(get_projection(args.columns)[2])
+        fiscal_calendar = FiscalCalendar(
+            args.fiscal_start[0], args.fiscal_start[1], args.fiscal_pattern,
+            weekdays[args.fiscal_week_end], args.fiscal_nearest,
+            args.fiscal_name_by)
+    except ValueError as e:
+        parser.error(str(e))
+    season_calendar = SeasonCalendar(args.seasons, args.hemisphere,
+                                     args.season_utc_offset)
+    # The generators yield the days after start, whose row they also build,
+    # and rows near either end of the years date can hold refer to days
+    # outside them
+    if args.first == datetime.date.min:
+        parser.error("FIRST_DATE must be after %s" % datetime.date.min)
+    start = args.first - datetime.timedelta(days=1)
+    if not args.holiday_bridge:
+        for d in (start, args.last):
+            try:
+                DateDimension(d, rule_set=args.rule_set,
+                              fiscal_calendar=fiscal_calendar,
+                              columns=get_projection(args.columns)[2],
+                              week_start=args.week_start,
+                              season_calendar=season_calendar,
+                              alternate_calendars=args.calendars)
+            except (ValueError, OverflowError):
+                parser.error("cannot generate rows from %s through %s" %
+                             (args.first, args.last))
+
+    kwargs = dict()
+    for option in ('columns', 'batch_size', 'table', 'compression'):
+        if getattr(args, option):
+            kwargs[option] = getattr(args, option)
+    if args.no_header:
+        kwargs['header'] = False
 
+    if args.output and args.output != '-':
+        partial = args.output + '.partial'
+        f = open(partial, 'wb')
+    else:
+        partial = None
+        f = sys.stdout
+    try:
+        if args.holiday_bridge:
+            write_holiday_bridge(f, start, args.last, args.format,
+                                 args.rule_set, **kwargs)
+        else:
+            write_date_dimension(
+                f, start, args.last, args.format, args.workers,
+                rule_set=args.rule_set, fiscal_calendar=fiscal_calendar,
+                week_start=args.week_start, season_calendar=season_calendar,
+                alternate_calendars=args.calendars, **kwargs)
+        f.flush()
+        if partial:
+            f.close()
+            os.rename(partial, args.output)
+    except BaseException:
+        if partial:
+            f.close()
+            os.remove(partial)
+        raise
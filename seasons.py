@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Seasons: astronomical ones beginning on the days of the equinoxes and
+solstices, meteorological ones beginning on the first of March, June,
+September and December, or the fixed cut-offs of earlier versions. The four
+boundaries of each year are computed once and kept as ordinals."""
+
+from bisect import bisect_right
+from datetime import date
+from calendars import astro
+from date_context import ORDINAL_EPOCH_JD
+
+ASTRONOMICAL = 'astronomical'
+METEOROLOGICAL = 'meteorological'
+# The Mar 20 / Jun 20 / Sep 22 / Dec 21 cut-offs DateDimension used to have
+FIXED = 'fixed'
+SEASON_KINDS = (ASTRONOMICAL, METEOROLOGICAL, FIXED)
+
+NORTHERN = 'northern'
+SOUTHERN = 'southern'
+
+# The season before the first boundary of the year, then the season each
+# boundary begins
+SEASON_NAMES = {
+    NORTHERN: ('Winter', 'Spring', 'Summer', 'Fall', 'Winter'),
+    SOUTHERN: ('Summer', 'Fall', 'Winter', 'Spring', 'Summer'),
+}
+
+FIXED_BOUNDARIES = ((3, 20), (6, 20), (9, 22), (12, 21))
+METEOROLOGICAL_BOUNDARIES = ((3, 1), (6, 1), (9, 1), (12, 1))
+
+
+def equinox_ordinal(year, which, utc_offset=0):
+    """Returns the ordinal of the day of the March equinox (which=0), June
+    solstice (1), September equinox (2) or December solstice (3) of year, in
+    the time zone utc_offset hours from UTC."""
+    # equinox gives dynamical time; deltat is its lead over universal time
+    jd = (astro.equinox(year, which) - astro.deltat(year) / 86400.0 +
+          utc_offset / 24.0)
+    return int(jd - ORDINAL_EPOCH_JD)
+
+
+class SeasonCalendar(object):
+    """Names the season of each day. kind is ASTRONOMICAL, METEOROLOGICAL
+    or FIXED, and hemisphere NORTHERN or SOUTHERN. Astronomical seasons
+    begin on the day, utc_offset hours from UTC, of the equinox or
+    solstice."""
+
+    def __init__(self, kind=ASTRONOMICAL, hemisphere=NORTHERN, utc_offset=0):
+        if kind not in SEASON_KINDS:
+            raise ValueError("Unknown season kind: %s" % kind)
+        if hemisphere not in SEASON_NAMES:
+            raise ValueError("Unknown hemisphere: %s" % hemisphere)
+        self.kind = kind
+        self.hemisphere = hemisphere
+        self.utc_offset = utc_offset
+        self.names = SEASON_NAMES[hemisphere]
+        # {year: ordinals of the four boundaries}
+        self._years = dict()
+
+    def get_boundaries(self, year):
+        """Returns the ordinals of the days the year's four seasons after
+        the first begin on."""
+        boundaries = self._years.get(year)
+        if boundaries is None:
+            if self.kind == ASTRONOMICAL:
+                boundaries = tuple(equinox_ordinal(year, which, self.utc_offset)
+                                   for which in range(4))
+            else:
+                boundaries = tuple(
+                    date(year, month, day).toordinal()
+                    for month, day in (FIXED_BOUNDARIES
+                                       if self.kind == FIXED
+                                       else METEOROLOGICAL_BOUNDARIES))
+            boundaries = self._years.setdefault(year, boundaries)
+        return boundaries
+
+    def get_season(self, d):
+        return self.names[bisect_right(self.get_boundaries(d.year),
+                                       d.toordinal())]
+
+    def cache_clear(self):
+        """Forgets the boundaries computed so far."""
+        self._years.clear()
+
+
+# Northern astronomical seasons by UTC day
+DEFAULT_SEASON_CALENDAR = SeasonCalendar()
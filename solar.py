@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#
+# Copyright 2014 Kevin M. Morenski <kmm2254@columbia.edu>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sunrise, sunset, solar noon and day length of each day at any number of
+locations. The Sun's declination and the equation of time do not depend on
+where it is seen from, so they are computed once for every day of a year,
+in one batch with calendars.astro_array where NumPy is installed, and shared
+by every location; each location's times are then a few trigonometric
+functions of them.
+
+The Sun is taken where it is at noon UTC, which puts the times within about
+a minute of an ephemeris computed for the moment itself, and times are local
+standard time, utc_offset hours from UTC, with no daylight saving."""
+
+from calendar import isleap
+from datetime import date
+from math import acos, cos, degrees, radians, sin
+from calendars import astro
+from calendars import astro_array
+from date_context import ORDINAL_EPOCH_JD
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The altitude of the Sun's center at sunrise and sunset, in degrees: its
+# upper limb on the horizon, raised by refraction
+SUNRISE_ALTITUDE = -0.833
+SIN_SUNRISE_ALTITUDE = sin(radians(SUNRISE_ALTITUDE))
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class Location(object):
+    """A site named by key (a string or an integer), latitude degrees north
+    and longitude degrees east, keeping time utc_offset hours from UTC."""
+
+    def __init__(self, key, latitude, longitude, utc_offset=0):
+        if not -90 < latitude < 90:
+            raise ValueError("latitude must be between -90 and 90")
+        if not -180 <= longitude <= 180:
+            raise ValueError("longitude must be between -180 and 180")
+        self.key = key
+        self.latitude = latitude
+        self.longitude = longitude
+        self.utc_offset = utc_offset
+        self.sin_latitude = sin(radians(latitude))
+        self.cos_latitude = cos(radians(latitude))
+
+    def __repr__(self):
+        return 'Location(%r, %r, %r, %r)' % (self.key, self.latitude,
+                                             self.longitude, self.utc_offset)
+
+
+def _equation_of_time_minutes(angle):
+    # astro's equation of time angle lies within two turns; reduce it to
+    # -180 to 180 degrees, at four minutes of time each
+    return 4 * ((angle + 180) % 360 - 180)
+
+
+class SolarEphemeris(object):
+    """The sine and cosine of the Sun's apparent declination and the
+    equation of time, in minutes, at noon UTC of each day, computed a year
+    at a time."""
+
+    def __init__(self):
+        # {year: (ordinal of January 1, [(sine, cosine, equation of time)])}
+        self._years = dict()
+
+    def _build_year(self, first_ordinal, days):
+        noon = first_ordinal + ORDINAL_EPOCH_JD + 0.5
+        jds = [noon + i for i in range(days)]
+        if np is not None:
+            declinations = astro_array.sunpos(jds)['DeltaApp'].tolist()
+            equations = _equation_of_time_minutes(
+                astro_array.equationOfTimeAngle(jds)).tolist()
+        else:
+            declinations = [astro.sunpos(jd)[11] for jd in jds]
+            equations = [_equation_of_time_minutes(
+                astro.equationOfTimeAngle(jd)) for jd in jds]
+        return first_ordinal, [
+            (sin(radians(declination)), cos(radians(declination)), equation)
+            for declination, equation in zip(declinations, equations)]
+
+    def get_year(self, year):
+        tables = self._years.get(year)
+        if tables is None:
+            first_ordinal = date(year, 1, 1).toordinal()
+            days = 366 if isleap(year) else 365
+            tables = self._years.setdefault(
+                year, self._build_year(first_ordinal, days))
+        return tables
+
+    def get_day(self, d):
+        """Returns the sine and cosine of the declination and the equation
+        of time of the date d."""
+        first_ordinal, days = self.get_year(d.year)
+        return days[d.toordinal() - first_ordinal]
+
+    def cache_clear(self):
+        """Forgets the years computed so far."""
+        self._years.clear()
+
+
+def _time(minutes):
+    # Minutes after midnight as HH:MM:SS, rounded to the second
+    seconds = int(round(minutes * 60)) % (MINUTES_PER_DAY * 60)
+    return '%02d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60,
+                               seconds % 60)
+
+
+def get_solar_columns(location, day):
+    """Returns the sunrise_time, sunset_time, solar_noon_time (local
+    HH:MM:SS) and day_length_minutes of the location on a day, given as
+    SolarEphemeris.get_day returns it. The Sun neither rises nor sets on
+    polar days and nights, whose times are None."""
+    sin_declination, cos_declination, equation_of_time = day
+    noon = (MINUTES_PER_DAY / 2 - 4 * location.longitude - equation_of_time +
+            60 * location.utc_offset)
+    cos_hour_angle = (
+        (SIN_SUNRISE_ALTITUDE - location.sin_latitude * sin_declination) /
+        (location.cos_latitude * cos_declination))
+    if cos_hour_angle > 1:
+        sunrise = sunset = None
+        day_length = 0
+    elif cos_hour_angle < -1:
+        sunrise = sunset = None
+        day_length = MINUTES_PER_DAY
+    else:
+        # Four minutes of time per degree of hour angle
+        half_day = 4 * degrees(acos(cos_hour_angle))
+        sunrise = _time(noon - half_day)
+        sunset = _time(noon + half_day)
+        day_length = int(round(2 * half_day))
+    return {
+        'sunrise_time': sunrise,
+        'sunset_time': sunset,
+        'solar_noon_time': _time(noon),
+        'day_length_minutes': day_length,
+    }
+
+
+# Shared by every table generated without an ephemeris of its own
+DEFAULT_SOLAR_EPHEMERIS = SolarEphemeris()